@@ -0,0 +1,124 @@
+"""Concurrency stress check for issuing the last copies of a book.
+
+Creates one book with a small stock and a set of members, fires hundreds
+of parallel checkouts through TransactionService, and verifies that
+exactly as many succeed as stock and the loan limit allow, the quantity
+never drops below zero and no member exceeds MAX_ACTIVE_LOANS. Everything
+it writes, including the MonthlyStat loan counts, is undone afterwards.
+
+    python -m benchmarks.checkout_stress --stock 3 --requests 300
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from config import MAX_ACTIVE_LOANS
+from database import prisma
+from exceptions import InvalidOperationException
+from models import TransactionCreate
+from services.transaction_service import TransactionService, _bump_monthly_stat
+
+async def stress(stock: int, requests: int, members: int) -> dict:
+    """Run one round of concurrent checkouts on a connected client and
+    return what happened; the rows it creates are removed before returning."""
+    run_id = uuid.uuid4().hex[:12]
+    service = TransactionService()
+    issue_date = datetime.now()
+    member_ids = []
+
+    try:
+        book = await prisma.book.create(data={
+            "title": f"Stress {run_id}",
+            "author": "Stress",
+            "isbn": f"stress-{run_id}",
+            "quantity": stock
+        })
+        for index in range(members):
+            member = await prisma.member.create(data={
+                "name": f"Stress {index}",
+                "email": f"stress-{run_id}-{index}@example.com"
+            })
+            member_ids.append(member.id)
+
+        async def checkout(index: int):
+            try:
+                await service.create_transaction(TransactionCreate(
+                    bookId=book.id, memberId=member_ids[index % members], issueDate=issue_date
+                ))
+                return "issued"
+            except InvalidOperationException:
+                return "rejected"
+            except Exception as e:
+                return f"error: {e}"
+
+        outcomes = await asyncio.gather(*(checkout(i) for i in range(requests)))
+
+        final = await prisma.book.find_unique(where={"id": book.id})
+        loans = await prisma.transaction.find_many(where={"bookId": book.id, "type": "ISSUE"})
+        borrowers = await prisma.member.find_many(where={"id": {"in": member_ids}})
+
+        return {
+            "issued": outcomes.count("issued"),
+            "rejected": outcomes.count("rejected"),
+            "errors": [outcome for outcome in outcomes if outcome.startswith("error")],
+            "finalQuantity": final.quantity,
+            "ledgerIssues": len(loans),
+            "maxLedgerLoans": max(Counter(loan.memberId for loan in loans).values(), default=0),
+            "maxActiveLoans": max((member.activeLoanCount for member in borrowers), default=0),
+        }
+
+    finally:
+        # Checkouts also bumped this month's loan count; take them back off
+        issued = await prisma.transaction.count(
+            where={"book": {"is": {"isbn": f"stress-{run_id}"}}, "type": "ISSUE"}
+        )
+        await prisma.transaction.delete_many(where={"book": {"is": {"isbn": f"stress-{run_id}"}}})
+        if issued:
+            await _bump_monthly_stat(prisma, issue_date, "loans", -issued)
+        await prisma.book.delete_many(where={"isbn": f"stress-{run_id}"})
+        await prisma.member.delete_many(where={"email": {"startswith": f"stress-{run_id}-"}})
+
+def expected_issues(stock: int, requests: int, members: int) -> int:
+    # Requests go round-robin over the members, so each one asks for at most
+    # ceil(requests / members) copies and gets at most MAX_ACTIVE_LOANS
+    per_member = [len(range(index, requests, members)) for index in range(members)]
+    return min(stock, sum(min(wanted, MAX_ACTIVE_LOANS) for wanted in per_member))
+
+def passed(result: dict, stock: int, requests: int, members: int) -> bool:
+    return (
+        not result["errors"]
+        and result["issued"] == expected_issues(stock, requests, members)
+        and result["finalQuantity"] == stock - result["issued"] >= 0
+        and result["ledgerIssues"] == result["issued"]
+        and result["maxLedgerLoans"] <= MAX_ACTIVE_LOANS
+        and result["maxActiveLoans"] <= MAX_ACTIVE_LOANS
+    )
+
+async def run(stock: int, requests: int, members: int) -> bool:
+    await prisma.connect()
+    try:
+        result = await stress(stock, requests, members)
+    finally:
+        await prisma.disconnect()
+
+    print(f"issued={result['issued']} rejected={result['rejected']} errors={len(result['errors'])} "
+          f"final_quantity={result['finalQuantity']} ledger_issues={result['ledgerIssues']} "
+          f"max_member_loans={result['maxLedgerLoans']}")
+    for error in result["errors"][:5]:
+        print(f"  {error}")
+
+    return passed(result, stock, requests, members)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stock", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--members", type=int, default=100)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.stock, args.requests, args.members))
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
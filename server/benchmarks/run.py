@@ -0,0 +1,337 @@
+"""Endpoint benchmark and load test for the Seeker API.
+
+Drives every route in routers/book.py, member.py and transaction.py with
+concurrent clients against a running server, reports throughput and
+p50/p95/p99 latency per endpoint, and stores the results as JSON.
+
+    # seed a local Postgres (DATABASE_URL) and benchmark reads
+    python -m benchmarks.run --seed --scale 100k --reset
+
+    # include write paths and fail on a >20% regression against a baseline
+    python -m benchmarks.run --writes --baseline benchmarks/results/base.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+RESULTS_DIR = Path(__file__).parent / "results"
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, name: str, client: httpx.AsyncClient, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "error"
+        self.samples[name].append(time.perf_counter() - started)
+        self.statuses[name][str(status)] += 1
+        return response
+
+class Context:
+    def __init__(self, books: int, members: int, transactions: int, rng: random.Random):
+        self.books, self.members, self.transactions, self.rng = books, members, transactions, rng
+
+    def book_id(self):
+        return self.rng.randint(1, max(self.books, 1))
+
+    def member_id(self):
+        return self.rng.randint(1, max(self.members, 1))
+
+    def transaction_id(self):
+        return self.rng.randint(1, max(self.transactions, 1))
+
+    def word(self):
+        return self.rng.choice(["Book 1", "Author 4", "978000", "Member 2", "member1"])
+
+def _json(response):
+    return response.json() if response is not None and response.status_code == 200 else None
+
+# Read scenarios ------------------------------------------------------------
+
+async def books_reads(client, rec, ctx):
+    await rec.call("GET /api/books/overview", client, "GET", "/api/books/overview")
+    await rec.call("GET /api/books/monthly-data", client, "GET", "/api/books/monthly-data")
+    await rec.call("GET /api/books", client, "GET", "/api/books",
+                   params={"page": ctx.rng.randint(1, 50), "limit": 20})
+    await rec.call("GET /api/books?search", client, "GET", "/api/books",
+                   params={"search": ctx.word(), "limit": 20})
+    await rec.call("GET /api/books/{id}", client, "GET", f"/api/books/{ctx.book_id()}")
+
+    page = _json(await rec.call("GET /api/books?cursor", client, "GET", "/api/books",
+                                params={"cursor": "", "limit": 20}))
+    for _ in range(3):
+        if not page or not page.get("next_cursor"):
+            break
+        page = _json(await rec.call("GET /api/books?cursor", client, "GET", "/api/books",
+                                    params={"cursor": page["next_cursor"], "limit": 20}))
+
+async def members_reads(client, rec, ctx):
+    await rec.call("GET /api/members", client, "GET", "/api/members",
+                   params={"page": ctx.rng.randint(1, 50), "limit": 20})
+    await rec.call("GET /api/members?search", client, "GET", "/api/members",
+                   params={"search": ctx.word(), "limit": 20})
+    member_id = ctx.member_id()
+    await rec.call("GET /api/members/{id}", client, "GET", f"/api/members/{member_id}")
+    await rec.call("GET /api/members/{id}/transactions", client, "GET",
+                   f"/api/members/{member_id}/transactions", params={"limit": 20})
+
+async def transactions_reads(client, rec, ctx):
+    await rec.call("GET /api/transactions", client, "GET", "/api/transactions",
+                   params={"page": ctx.rng.randint(1, 50), "limit": 20})
+    await rec.call("GET /api/transactions?search", client, "GET", "/api/transactions",
+                   params={"search": ctx.word(), "limit": 20})
+    await rec.call("GET /api/transactions?cursor", client, "GET", "/api/transactions",
+                   params={"cursor": "", "limit": 20, "expand": "book,member"})
+    await rec.call("GET /api/transactions/monthly-data", client, "GET", "/api/transactions/monthly-data")
+    await rec.call("GET /api/transactions/recent", client, "GET", "/api/transactions/recent")
+    await rec.call("GET /api/transactions/{id}", client, "GET",
+                   f"/api/transactions/{ctx.transaction_id()}")
+
+async def exports(client, rec, ctx):
+    for name in ("books", "members", "transactions"):
+        await rec.call(f"GET /api/{name}/export", client, "GET", f"/api/{name}/export",
+                       params={"format": "ndjson", "gzip": "true"})
+
+async def frappe_search(client, rec, ctx):
+    await rec.call("GET /api/books/search/frappe", client, "GET", "/api/books/search/frappe",
+                   params={"title": ctx.rng.choice(["harry", "potter", "ring", "history"])})
+
+# Write scenarios -----------------------------------------------------------
+
+async def checkout_cycle(client, rec, ctx):
+    issued = _json(await rec.call("POST /api/transactions", client, "POST", "/api/transactions",
+                                  json={"bookId": ctx.book_id(), "memberId": ctx.member_id()}))
+    if issued:
+        await rec.call("POST /api/transactions/{id}/return", client, "POST",
+                       f"/api/transactions/{issued['id']}/return",
+                       json={"return_date": datetime.now(timezone.utc).isoformat(), "rent_fee": 0})
+
+async def batch_cycle(client, rec, ctx):
+    issued = _json(await rec.call("POST /api/transactions/batch-issue", client, "POST",
+                                  "/api/transactions/batch-issue",
+                                  json={"memberId": ctx.member_id(),
+                                        "bookIds": [ctx.book_id() for _ in range(3)]}))
+    items = [
+        {"transactionId": result["transactionId"], "rent_fee": 0}
+        for result in (issued or {}).get("results", []) if result["status"] == "issued"
+    ]
+    if items:
+        await rec.call("POST /api/transactions/batch-return", client, "POST",
+                       "/api/transactions/batch-return",
+                       json={"return_date": datetime.now(timezone.utc).isoformat(), "items": items})
+
+async def transaction_delete(client, rec, ctx):
+    issued = _json(await client.post("/api/transactions",
+                                     json={"bookId": ctx.book_id(), "memberId": ctx.member_id()}))
+    if issued:
+        await rec.call("DELETE /api/transactions/{id}", client, "DELETE",
+                       f"/api/transactions/{issued['id']}")
+
+async def book_crud(client, rec, ctx):
+    isbn = f"bench-{uuid.uuid4().hex[:16]}"
+    body = {"title": "Bench book", "author": "Bench", "isbn": isbn, "quantity": 1}
+    book = _json(await rec.call("POST /api/books", client, "POST", "/api/books", json=body))
+    if book:
+        await rec.call("PUT /api/books/{id}", client, "PUT", f"/api/books/{book['id']}",
+                       json={**body, "title": "Bench book (edited)"})
+        await rec.call("DELETE /api/books/{id}", client, "DELETE", f"/api/books/{book['id']}")
+
+async def book_import(client, rec, ctx):
+    prefix = uuid.uuid4().hex[:12]
+    books = [
+        {"title": f"Import {i}", "author": "Bench", "isbn": f"bench-{prefix}-{i}", "quantity": 1}
+        for i in range(100)
+    ]
+    await rec.call("POST /api/books/import-multiple", client, "POST", "/api/books/import-multiple",
+                   json=books)
+
+async def member_crud(client, rec, ctx):
+    body = {"name": "Bench member", "email": f"bench-{uuid.uuid4().hex[:16]}@example.com"}
+    member = _json(await rec.call("POST /api/members", client, "POST", "/api/members", json=body))
+    if member:
+        member_id = member["id"]
+        await rec.call("PUT /api/members/{id}", client, "PUT", f"/api/members/{member_id}",
+                       json={**body, "name": "Bench member (edited)"})
+        await rec.call("POST /api/members/{id}/pay-debt", client, "POST",
+                       f"/api/members/{member_id}/pay-debt", params={"amount": 1})
+        await rec.call("POST /api/members/{id}/clear-debt", client, "POST",
+                       f"/api/members/{member_id}/clear-debt")
+        await rec.call("DELETE /api/members/{id}", client, "DELETE", f"/api/members/{member_id}")
+
+READ_SCENARIOS = {
+    "books": books_reads,
+    "members": members_reads,
+    "transactions": transactions_reads,
+}
+WRITE_SCENARIOS = {
+    "checkout": checkout_cycle,
+    "batch": batch_cycle,
+    "transaction-delete": transaction_delete,
+    "book-crud": book_crud,
+    "book-import": book_import,
+    "member-crud": member_crud,
+}
+
+# Runner ----------------------------------------------------------------------
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+async def run_scenario(scenario, base_url, ctx, concurrency, duration, rec):
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def worker():
+            while time.monotonic() < deadline:
+                await scenario(client, rec, ctx)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+def summarize(rec: Recorder, elapsed: dict):
+    endpoints = {}
+    for name, samples in sorted(rec.samples.items()):
+        ordered = sorted(samples)
+        statuses = dict(rec.statuses[name])
+        failures = sum(count for status, count in statuses.items()
+                       if status == "error" or status.startswith("5"))
+        endpoints[name] = {
+            "requests": len(samples),
+            "failures": failures,
+            "statuses": statuses,
+            "throughput": len(samples) / elapsed[name],
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+        }
+    return endpoints
+
+def print_table(endpoints):
+    print(f"{'endpoint':48} {'req':>7} {'fail':>5} {'req/s':>9} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, stats in endpoints.items():
+        print(f"{name:48} {stats['requests']:>7} {stats['failures']:>5} {stats['throughput']:>9.1f} "
+              f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+
+def compare(endpoints, baseline_path: Path, threshold: float):
+    """Return the regressions of this run against a stored baseline."""
+    baseline = json.loads(baseline_path.read_text())["endpoints"]
+    regressions = []
+    for name, stats in endpoints.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if before["p95_ms"] > 0 and stats["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms")
+        if before["throughput"] > 0 and stats["throughput"] < before["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {before['throughput']:.1f} -> {stats['throughput']:.1f} req/s"
+            )
+        if stats["failures"] > before.get("failures", 0):
+            regressions.append(f"{name}: failures {before.get('failures', 0)} -> {stats['failures']}")
+    return regressions
+
+async def discover(base_url):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        overview = (await client.get("/api/books/overview")).json()
+        recent = (await client.get("/api/transactions/recent",
+                                   params={"limit": 1, "fields": "id"})).json()
+    return overview["totalBooks"], overview["totalMembers"], recent[0]["id"] if recent else 0
+
+async def main(args):
+    if args.seed:
+        from benchmarks.seed import seed
+        await seed(SCALES[args.scale], args.random_seed, args.reset)
+
+    books, members, transactions = await discover(args.base_url)
+    ctx = Context(books, members, transactions, random.Random(args.random_seed))
+    print(f"Benchmarking {args.base_url}: {books} books, {members} members, "
+          f"~{transactions} transactions, {args.concurrency} clients, {args.duration}s per scenario")
+
+    scenarios = dict(READ_SCENARIOS)
+    if args.exports:
+        scenarios["exports"] = exports
+    if args.external:
+        scenarios["frappe"] = frappe_search
+    if args.writes:
+        scenarios.update(WRITE_SCENARIOS)
+    if args.only:
+        scenarios = {name: fn for name, fn in scenarios.items() if name in args.only}
+
+    rec = Recorder()
+    elapsed = {}
+    for name, scenario in scenarios.items():
+        before = set(rec.samples)
+        started = time.monotonic()
+        await run_scenario(scenario, args.base_url, ctx, args.concurrency, args.duration, rec)
+        for endpoint in set(rec.samples) - before:
+            elapsed[endpoint] = time.monotonic() - started
+
+    endpoints = summarize(rec, elapsed)
+    print_table(endpoints)
+
+    result = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "scale": args.scale,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "dataset": {"books": books, "members": members, "transactions": transactions},
+        "endpoints": endpoints,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.scale}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        regressions = compare(endpoints, Path(args.baseline), args.threshold)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Seeker API benchmark and load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scale", choices=SCALES, default="10k",
+                        help="transactions to seed with --seed")
+    parser.add_argument("--seed", action="store_true", help="seed the database before running")
+    parser.add_argument("--reset", action="store_true", help="truncate tables before seeding")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15, help="seconds per scenario")
+    parser.add_argument("--writes", action="store_true", help="include write scenarios")
+    parser.add_argument("--exports", action="store_true", help="include full-table export scenarios")
+    parser.add_argument("--external", action="store_true", help="include the Frappe proxy")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output", help="result file (default benchmarks/results/<time>-<scale>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative regression before the run fails")
+    return parser
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(build_parser().parse_args())))
@@ -0,0 +1,263 @@
+"""Deterministic high-volume data generator for scale testing.
+
+Generates Books (unique ISBNs), Members (unique emails) and a consistent
+ISSUE/RETURN ledger by simulating the library in time order: a loan is only
+issued when the book has a copy on the shelf and the member is under the
+loan limit, every RETURN links to its ISSUE through relatedTransactionId,
+and loans still out at the end stay open. Stock, loan counters, the monthly
+rollup and the ledger search column are written to match.
+
+Rows are written with Postgres COPY when asyncpg is installed and with
+chunked create_many otherwise. The same --seed always produces the same data.
+
+    python -m benchmarks.seed --transactions 5000000 --reset
+"""
+import argparse
+import asyncio
+import heapq
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence
+from urllib.parse import urlsplit, urlunsplit
+
+from prisma import Prisma
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+from config import MAX_ACTIVE_LOANS
+
+CHUNK_SIZE = 10_000
+HISTORY_DAYS = 3 * 365
+
+BOOK_COLUMNS = ("id", "title", "author", "isbn", "quantity", "onLoanCount", "publisher",
+                "createdAt", "updatedAt")
+MEMBER_COLUMNS = ("id", "name", "email", "address", "outstandingDebt", "activeLoanCount",
+                  "createdAt", "updatedAt")
+TRANSACTION_COLUMNS = ("id", "type", "bookId", "memberId", "issueDate", "returnDate", "rentFee",
+                       "relatedTransactionId", "searchText", "createdAt", "updatedAt")
+MONTHLY_COLUMNS = ("month", "loans", "returns", "updatedAt")
+
+WORDS = ("Silent", "River", "Empire", "Garden", "Shadow", "Winter", "Atlas", "Glass", "Iron",
+         "Ocean", "Paper", "Crown", "Forest", "Signal", "Harbor", "Echo", "Orbit", "Lantern")
+FIRST_NAMES = ("Ada", "Ben", "Chen", "Dara", "Eli", "Fatima", "Gus", "Hana", "Ivan", "Jules",
+               "Kofi", "Lena", "Mateo", "Nia", "Omar", "Priya", "Quinn", "Rosa", "Sami", "Tove")
+LAST_NAMES = ("Abe", "Brown", "Costa", "Diaz", "Evans", "Fischer", "Garcia", "Haddad", "Ito",
+              "Jensen", "Kim", "Lopez", "Moreau", "Nowak", "Okafor", "Patel", "Rossi", "Silva")
+
+class PrismaWriter:
+    """Fallback writer: chunked create_many through the Prisma client."""
+
+    def __init__(self, db: Prisma):
+        self.db = db
+
+    async def write(self, table: str, columns: Sequence[str], rows: List[tuple]):
+        delegate = getattr(self.db, table.lower())
+        for start in range(0, len(rows), CHUNK_SIZE):
+            await delegate.create_many(
+                data=[dict(zip(columns, row)) for row in rows[start:start + CHUNK_SIZE]]
+            )
+
+    async def close(self):
+        pass
+
+class CopyWriter:
+    """Writes rows with Postgres COPY over a direct asyncpg connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @classmethod
+    async def connect(cls, url: str):
+        parts = urlsplit(url)
+        # Prisma-only query params (schema, connection_limit, ...) are not
+        # understood by asyncpg.
+        return cls(await asyncpg.connect(urlunsplit(parts._replace(query=""))))
+
+    async def write(self, table: str, columns: Sequence[str], rows: List[tuple]):
+        await self.connection.copy_records_to_table(table, records=rows, columns=list(columns))
+
+    async def close(self):
+        await self.connection.close()
+
+async def reset_database(db: Prisma):
+    await db.execute_raw(
+        'TRUNCATE "Transaction", "Book", "Member", "MonthlyStat" RESTART IDENTITY CASCADE'
+    )
+
+def _isbn(index: int) -> str:
+    return f"978{index:010d}"
+
+def _book(index: int, rng: random.Random):
+    title = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {index}"
+    author = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return title, author
+
+def _member(index: int, rng: random.Random):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return name, f"member{index}@example.com"
+
+async def seed_database(db: Prisma, transactions: int, seed: int = 42, writer=None):
+    """Generate roughly `transactions` ledger rows plus matching books and members."""
+    rng = random.Random(seed)
+    writer = writer or PrismaWriter(db)
+    started = time.monotonic()
+
+    book_count = max(transactions // 20, 100)
+    member_count = max(transactions // 40, 50)
+    now = datetime.utcnow().replace(microsecond=0)
+    origin = now - timedelta(days=HISTORY_DAYS)
+
+    titles: List[str] = []
+    stock: List[int] = [0]
+    book_rows = []
+    for index in range(1, book_count + 1):
+        title, author = _book(index, rng)
+        copies = rng.randint(1, 8)
+        titles.append(title)
+        stock.append(copies)
+        created = origin - timedelta(days=rng.randint(1, 365))
+        book_rows.append((index, title, author, _isbn(index), copies, 0,
+                          rng.choice((None, "Penguin", "Vintage", "Orbit", "Tor")), created, created))
+    total_stock = list(stock)
+    await writer.write("Book", BOOK_COLUMNS, book_rows)
+    del book_rows
+
+    people: List[tuple] = [("", "")]
+    member_rows = []
+    for index in range(1, member_count + 1):
+        name, email = _member(index, rng)
+        people.append((name, email))
+        created = origin - timedelta(days=rng.randint(1, 365))
+        member_rows.append((index, name, email, None, 0.0, 0, created, created))
+    await writer.write("Member", MEMBER_COLUMNS, member_rows)
+    del member_rows
+    print(f"Wrote {book_count} books and {member_count} members")
+
+    loans_out = [0] * (member_count + 1)
+    monthly: Dict[datetime, List[int]] = defaultdict(lambda: [0, 0])
+    pending = []
+    buffer = []
+    next_id = 1
+    written = 0
+    step = (now - origin) / max(transactions // 2, 1)
+    clock = origin
+
+    def search_text(book_id, member_id):
+        name, email = people[member_id]
+        return f"{titles[book_id - 1]} {name} {email}".lower()
+
+    async def flush(force=False):
+        nonlocal buffer, written
+        if buffer and (force or len(buffer) >= CHUNK_SIZE):
+            await writer.write("Transaction", TRANSACTION_COLUMNS, buffer)
+            written += len(buffer)
+            buffer = []
+
+    def emit_return(due, issue_id, book_id, member_id, issued):
+        nonlocal next_id
+        fee = round(max((due - issued).days - 14, 0) * 0.5, 2)
+        buffer.append((next_id, "RETURN", book_id, member_id, issued, due, fee, issue_id,
+                       search_text(book_id, member_id), due, due))
+        monthly[datetime(due.year, due.month, 1)][1] += 1
+        stock[book_id] += 1
+        loans_out[member_id] -= 1
+        next_id += 1
+
+    while next_id <= transactions and clock < now:
+        clock += step
+        while pending and pending[0][0] <= clock:
+            emit_return(*heapq.heappop(pending))
+
+        for _ in range(8):
+            book_id = rng.randint(1, book_count)
+            member_id = rng.randint(1, member_count)
+            if stock[book_id] > 0 and loans_out[member_id] < MAX_ACTIVE_LOANS:
+                break
+        else:
+            continue
+
+        issued = clock.replace(microsecond=0)
+        buffer.append((next_id, "ISSUE", book_id, member_id, issued, None, None, None,
+                       search_text(book_id, member_id), issued, issued))
+        monthly[datetime(issued.year, issued.month, 1)][0] += 1
+        stock[book_id] -= 1
+        loans_out[member_id] += 1
+
+        due = issued + timedelta(days=rng.randint(1, 45), hours=rng.randint(0, 23))
+        if due < now:
+            heapq.heappush(pending, (due, next_id, book_id, member_id, issued))
+        next_id += 1
+        await flush()
+
+    while pending and next_id <= transactions:
+        emit_return(*heapq.heappop(pending))
+        await flush()
+    # Loans still in `pending` were never returned and stay open.
+    await flush(force=True)
+
+    await writer.write("MonthlyStat", MONTHLY_COLUMNS, [
+        (month, loans, returns, now) for month, (loans, returns) in sorted(monthly.items())
+    ])
+
+    await _write_counters(db, stock, total_stock, loans_out)
+    for table in ("Book", "Member", "Transaction"):
+        await db.query_raw(
+            f"""SELECT setval(pg_get_serial_sequence('"{table}"', 'id'), COALESCE(MAX("id"), 1)) FROM "{table}\""""
+        )
+
+    print(f"Wrote {written} transactions in {time.monotonic() - started:.1f}s")
+
+async def _write_counters(db: Prisma, stock, total_stock, loans_out):
+    books = [(book_id, stock[book_id], total_stock[book_id] - stock[book_id])
+             for book_id in range(1, len(stock)) if stock[book_id] != total_stock[book_id]]
+    for start in range(0, len(books), CHUNK_SIZE):
+        chunk = books[start:start + CHUNK_SIZE]
+        await db.execute_raw(
+            """UPDATE "Book" AS b SET "quantity" = v."quantity", "onLoanCount" = v."onLoan"
+               FROM unnest($1::int[], $2::int[], $3::int[]) AS v("id", "quantity", "onLoan")
+               WHERE b."id" = v."id\"""",
+            [row[0] for row in chunk], [row[1] for row in chunk], [row[2] for row in chunk]
+        )
+
+    members = [(member_id, count) for member_id, count in enumerate(loans_out) if member_id and count]
+    for start in range(0, len(members), CHUNK_SIZE):
+        chunk = members[start:start + CHUNK_SIZE]
+        await db.execute_raw(
+            """UPDATE "Member" AS m SET "activeLoanCount" = v."loans"
+               FROM unnest($1::int[], $2::int[]) AS v("id", "loans")
+               WHERE m."id" = v."id\"""",
+            [row[0] for row in chunk], [row[1] for row in chunk]
+        )
+
+async def seed(transactions: int, seed: int = 42, reset: bool = False, use_copy: bool = True):
+    db = Prisma()
+    await db.connect()
+    writer = None
+    try:
+        if reset:
+            await reset_database(db)
+        if use_copy and asyncpg is not None and os.environ.get("DATABASE_URL"):
+            writer = await CopyWriter.connect(os.environ["DATABASE_URL"])
+        else:
+            print("asyncpg not available; writing with create_many")
+        await seed_database(db, transactions, seed, writer)
+    finally:
+        if writer is not None:
+            await writer.close()
+        await db.disconnect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a large, consistent library dataset")
+    parser.add_argument("--transactions", type=int, default=100_000,
+                        help="approximate number of ledger rows to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="truncate all tables first")
+    parser.add_argument("--no-copy", action="store_true", help="use create_many even if asyncpg is installed")
+    args = parser.parse_args()
+    asyncio.run(seed(args.transactions, args.seed, args.reset, not args.no_copy))
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """Serves a single computed value for `ttl` seconds.
+
+    Concurrent callers share one in-flight computation. Once the value is
+    stale it keeps being served while a single background task refreshes it,
+    so only the very first caller ever waits on the loader.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], ttl: float):
+        self._loader = loader
+        self._ttl = ttl
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get(self):
+        if self._loaded_at is None:
+            return await self._refresh()
+
+        if time.monotonic() - self._loaded_at >= self._ttl:
+            self._refresh().add_done_callback(self._log_failure)
+
+        return self._value
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _refresh(self) -> asyncio.Future:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._load())
+        return asyncio.shield(self._refresh_task)
+
+    async def _load(self):
+        value = await self._loader()
+        self._value = value
+        self._loaded_at = time.monotonic()
+        return value
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Background snapshot refresh failed: %s", future.exception())
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class EntityCache:
+    """Async read-through cache with stampede protection.
+
+    Concurrent misses for the same key share one loader call. `invalidate`
+    must be called after every write that changes an entity; it also
+    detaches any load already in flight, so a read that started before the
+    write can never repopulate the cache with the old row.
+
+    Entries are per process: `on_invalidate` is called with the invalidated
+    keys so they can be passed on to other processes, which apply them with
+    `forget`. While `bypass()` is true, reads skip the cache and go straight
+    to the loader.
+    """
+
+    def __init__(self, maxsize: int, ttl: float,
+                 on_invalidate: Optional[Callable[[tuple], None]] = None,
+                 bypass: Optional[Callable[[], bool]] = None):
+        self._entries = TTLCache(maxsize, ttl)
+        self._inflight: dict = {}
+        self._on_invalidate = on_invalidate
+        self._bypass = bypass
+
+    async def get_or_load(self, key, loader: Callable[[], Awaitable[Any]]):
+        if self._bypass is not None and self._bypass():
+            return await loader()
+
+        value = self._entries.get(key)
+        if value is not None:
+            return value
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(loader())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._store(key, done))
+
+        return await asyncio.shield(future)
+
+    def _store(self, key, future: asyncio.Future):
+        if self._inflight.get(key) is not future:
+            return
+        del self._inflight[key]
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            self._entries.set(key, future.result())
+
+    def invalidate(self, *keys):
+        self.forget(*keys)
+        if keys and self._on_invalidate is not None:
+            self._on_invalidate(keys)
+
+    def forget(self, *keys):
+        for key in keys:
+            self._entries.pop(key)
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
@@ -0,0 +1,99 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+# Computed on read rather than stored on the row, so updatedAt alone does not
+# tell whether they changed (overdueCount moves with the clock)
+DERIVED_FIELDS = ("totalLoans", "lastActivity", "overdueCount")
+
+def _as_dict(value) -> Optional[dict]:
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    if isinstance(value, dict):
+        return value
+    return None
+
+def _collect(value, stamps: list, modified: list):
+    data = _as_dict(value)
+    if data is None:
+        if isinstance(value, (list, tuple)):
+            stamps.append(len(value))
+            for item in value:
+                _collect(item, stamps, modified)
+        else:
+            stamps.append(value)
+        return
+
+    updated_at = data.get("updatedAt")
+    if isinstance(updated_at, datetime):
+        # A row's scalars are covered by its updatedAt; only nested relations
+        # and derived values need to be walked
+        modified.append(updated_at)
+        stamps.append((data.get("id"), updated_at.isoformat()))
+        for name in DERIVED_FIELDS:
+            if name in data:
+                stamps.append(data[name])
+        for name, item in data.items():
+            if isinstance(item, (BaseModel, dict, list, tuple)):
+                stamps.append(name)
+                _collect(item, stamps, modified)
+        return
+
+    for name, item in data.items():
+        stamps.append(name)
+        _collect(item, stamps, modified)
+
+def validators(content):
+    """Build (ETag, Last-Modified) for a detail object or a list page.
+
+    The tag is derived from each row's id and updatedAt (plus page metadata
+    such as total and cursor) instead of the serialized body, so an
+    unchanged response can be answered before it is encoded.
+    """
+    stamps, modified = [], []
+    _collect(content, stamps, modified)
+
+    digest = hashlib.blake2b(repr(stamps).encode(), digest_size=16).hexdigest()
+    last_modified = max(modified) if modified else None
+    return f'W/"{digest}"', last_modified
+
+def _to_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or etag[2:] in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _to_utc(last_modified).replace(microsecond=0) <= _to_utc(since)
+    return False
+
+def conditional(request: Request, response: Response, content):
+    """Answer a GET with 304 when the client already holds this version.
+
+    Otherwise the validators are set on `response` and `content` is returned
+    for FastAPI to serialize as usual.
+    """
+    etag, last_modified = validators(content)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_to_utc(last_modified), usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return content
@@ -0,0 +1,125 @@
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Read .env the way the Prisma CLI does (server/.env, then prisma/.env)
+# before any setting below, or DATABASE_URL, is looked up; real environment
+# variables win
+_root = Path(__file__).resolve().parent
+load_dotenv(_root / ".env")
+load_dotenv(_root / "prisma" / ".env")
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+# Seconds a dashboard overview snapshot is served before it is refreshed
+OVERVIEW_TTL_SECONDS = _float("OVERVIEW_TTL_SECONDS", 10)
+
+# Seconds an approximate (cached) list total is reused across pages
+COUNT_CACHE_TTL_SECONDS = _float("COUNT_CACHE_TTL_SECONDS", 30)
+COUNT_CACHE_SIZE = _int("COUNT_CACHE_SIZE", 1024)
+
+# Book search backend: "postgres" (trigram indexes) or "memory" (an inverted
+# index in every worker, kept in step over the events channel; meant for
+# small catalogues)
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "postgres")
+
+# Rows written per create_many/update batch by the bulk book importer
+IMPORT_CHUNK_SIZE = _int("IMPORT_CHUNK_SIZE", 500)
+
+# Frappe catalogue proxy
+FRAPPE_API_URL = os.environ.get("FRAPPE_API_URL", "https://frappe.io/api/method/frappe-library")
+FRAPPE_TIMEOUT_SECONDS = _float("FRAPPE_TIMEOUT_SECONDS", 10)
+FRAPPE_CONNECT_TIMEOUT_SECONDS = _float("FRAPPE_CONNECT_TIMEOUT_SECONDS", 3)
+FRAPPE_RETRIES = _int("FRAPPE_RETRIES", 2)
+FRAPPE_RETRY_BACKOFF_SECONDS = _float("FRAPPE_RETRY_BACKOFF_SECONDS", 0.2)
+FRAPPE_MAX_CONNECTIONS = _int("FRAPPE_MAX_CONNECTIONS", 20)
+FRAPPE_CACHE_TTL_SECONDS = _float("FRAPPE_CACHE_TTL_SECONDS", 300)
+FRAPPE_CACHE_SIZE = _int("FRAPPE_CACHE_SIZE", 512)
+
+# Maximum number of books a member may have on loan at once
+MAX_ACTIVE_LOANS = _int("MAX_ACTIVE_LOANS", 5)
+
+# Interactive transaction limits: how long to wait for a pooled connection
+# and how long the transaction may run before it is rolled back
+TX_MAX_WAIT_SECONDS = _float("TX_MAX_WAIT_SECONDS", 10)
+TX_TIMEOUT_SECONDS = _float("TX_TIMEOUT_SECONDS", 15)
+
+# Days a book may be kept before an open loan counts as overdue
+LOAN_PERIOD_DAYS = _int("LOAN_PERIOD_DAYS", 14)
+
+# Rows fetched per keyset query when streaming exports
+EXPORT_CHUNK_SIZE = _int("EXPORT_CHUNK_SIZE", 2000)
+
+# Requests slower than this are logged with their query breakdown (0 disables)
+SLOW_REQUEST_MS = _float("SLOW_REQUEST_MS", 0)
+
+# Read-through cache for book and member lookups (per worker process, with
+# invalidations sent to every worker over the events channel)
+ENTITY_CACHE_SIZE = _int("ENTITY_CACHE_SIZE", 10000)
+ENTITY_CACHE_TTL_SECONDS = _float("ENTITY_CACHE_TTL_SECONDS", 30)
+
+# Rental fee policy: charge per day kept, the first FEE_GRACE_DAYS are free
+# and FEE_CAP limits the fee for a single loan (0 means uncapped)
+FEE_DAILY_RATE = _float("FEE_DAILY_RATE", 2.0)
+FEE_GRACE_DAYS = _int("FEE_GRACE_DAYS", 0)
+FEE_CAP = _float("FEE_CAP", 0)
+
+# Open loans evaluated per query by the fee accrual job
+FEE_ACCRUAL_BATCH_SIZE = _int("FEE_ACCRUAL_BATCH_SIZE", 10000)
+
+# Primary database; required
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+# Optional read replica for lag-tolerant reads (lists, searches, exports,
+# analytics). Unset means every query goes to DATABASE_URL. Any second
+# Postgres with the same schema works for local testing.
+DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL") or None
+
+# After a write, the client's reads stay on the primary and skip caches for
+# this long so it sees its own changes despite replication lag and caches in
+# other workers
+READ_YOUR_WRITES_SECONDS = _int("READ_YOUR_WRITES_SECONDS", 5)
+
+# Connections each worker process may open to Postgres (per client, so a
+# replica doubles it) and how long a query waits for one. Keep
+# workers * DB_POOL_SIZE below the server's max_connections.
+DB_POOL_SIZE = _int("DB_POOL_SIZE", 5)
+DB_POOL_TIMEOUT_SECONDS = _int("DB_POOL_TIMEOUT_SECONDS", 10)
+
+# Background jobs: how many run at once per worker, and where their state
+# lives ("postgres" uses the Job table, "redis" any Redis-compatible server)
+JOB_CONCURRENCY = _int("JOB_CONCURRENCY", 2)
+JOB_STORE = os.environ.get("JOB_STORE", "postgres")
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+JOB_TTL_SECONDS = _int("JOB_TTL_SECONDS", 7 * 24 * 3600)
+# Minimum seconds between persisted progress updates of a running job
+JOB_PROGRESS_INTERVAL_SECONDS = _float("JOB_PROGRESS_INTERVAL_SECONDS", 0.5)
+
+# Frappe enrichment: books looked up per batch, and the cover image URL
+# template filled in for books Frappe recognises (empty disables covers,
+# e.g. https://covers.openlibrary.org/b/isbn/{isbn}-M.jpg). A cover is only
+# stored after a HEAD request with ?default=false finds it.
+ENRICH_BATCH_SIZE = _int("ENRICH_BATCH_SIZE", 50)
+ENRICH_COVER_URL = os.environ.get("ENRICH_COVER_URL", "")
+ENRICH_COVER_TIMEOUT_SECONDS = _float("ENRICH_COVER_TIMEOUT_SECONDS", 5)
+
+# Live dashboard events: after a write, state feeds are recomputed once per
+# debounce window; with subscribers connected they are also refreshed every
+# EVENTS_REFRESH_SECONDS as a safety net
+EVENTS_DEBOUNCE_SECONDS = _float("EVENTS_DEBOUNCE_SECONDS", 0.5)
+EVENTS_REFRESH_SECONDS = _float("EVENTS_REFRESH_SECONDS", 15)
+EVENTS_QUEUE_SIZE = _int("EVENTS_QUEUE_SIZE", 100)
+
+# How events reach the other worker processes: "postgres" (LISTEN/NOTIFY
+# over one asyncpg connection per worker) or "memory" (this process only,
+# for single-worker deployments)
+EVENTS_BACKEND = os.environ.get("EVENTS_BACKEND", "postgres")
+EVENTS_RECONNECT_SECONDS = _float("EVENTS_RECONNECT_SECONDS", 2)
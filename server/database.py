@@ -1,4 +1,70 @@
+import asyncio
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 from prisma import Prisma
 
+from config import (
+    DATABASE_URL, TX_MAX_WAIT_SECONDS, TX_TIMEOUT_SECONDS, DATABASE_REPLICA_URL,
+    DB_POOL_SIZE, DB_POOL_TIMEOUT_SECONDS
+)
+from metrics import instrument_client
+
+# Count and time every query, including those run inside transactions
+instrument_client(Prisma)
+
+def pooled_url(url: Optional[str]) -> Optional[str]:
+    """Add this worker's pool limits to a connection URL unless it sets its own"""
+    if not url:
+        return url
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.setdefault("connection_limit", str(DB_POOL_SIZE))
+    query.setdefault("pool_timeout", str(DB_POOL_TIMEOUT_SECONDS))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def _client(url: str) -> Prisma:
+    return Prisma(datasource={"url": pooled_url(url)})
+
+if not DATABASE_URL:
+    # Without it the pool limits above cannot be applied, and Prisma would
+    # fall back to an unsized pool
+    raise RuntimeError("DATABASE_URL is not set (in the environment or .env)")
+
 # Create a single instance of Prisma client
-prisma = Prisma() 
\ No newline at end of file
+prisma = _client(DATABASE_URL)
+
+# Read-only client for replica-safe queries, if a replica is configured
+replica = _client(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+
+_reads_on_primary: ContextVar[bool] = ContextVar("reads_on_primary", default=False)
+
+def read_client() -> Prisma:
+    """Client for reads that tolerate replication lag.
+
+    Returns the replica unless none is configured or the current request
+    has been pinned to the primary to read its own writes.
+    """
+    if replica is None or _reads_on_primary.get():
+        return prisma
+    return replica
+
+def pin_reads_to_primary():
+    _reads_on_primary.set(True)
+
+def reads_pinned() -> bool:
+    """True while serving a write, or a read right after one by the same client"""
+    return _reads_on_primary.get()
+
+async def warm_pool():
+    """Open every pooled connection up front instead of on the first requests"""
+    for client in filter(None, (prisma, replica)):
+        await asyncio.gather(*(client.query_raw("SELECT 1") for _ in range(DB_POOL_SIZE)))
+
+def transaction_scope():
+    return prisma.tx(
+        max_wait=timedelta(seconds=TX_MAX_WAIT_SECONDS),
+        timeout=timedelta(seconds=TX_TIMEOUT_SECONDS)
+    )
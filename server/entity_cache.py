@@ -0,0 +1,26 @@
+from cache import EntityCache
+from config import ENTITY_CACHE_SIZE, ENTITY_CACHE_TTL_SECONDS
+from database import reads_pinned
+from events import broadcaster
+
+def _shared(name: str) -> EntityCache:
+    # Invalidations reach the other workers over the event channel. Until
+    # they arrive there, the writing client is kept away from cached rows:
+    # its reads are pinned for READ_YOUR_WRITES_SECONDS after every write.
+    cache = EntityCache(
+        ENTITY_CACHE_SIZE, ENTITY_CACHE_TTL_SECONDS,
+        on_invalidate=lambda keys: broadcaster.send("invalidate", {"cache": name, "keys": list(keys)}),
+        bypass=reads_pinned
+    )
+
+    def forget(data: dict):
+        if data["cache"] == name:
+            cache.forget(*data["keys"])
+
+    broadcaster.on("invalidate", forget)
+    broadcaster.on("reset", lambda _: cache.clear())
+    return cache
+
+# Shared by every service; keyed on the entity id
+book_cache = _shared("book")
+member_cache = _shared("member")
@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit, urlunsplit
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from config import (
+    EVENTS_DEBOUNCE_SECONDS, EVENTS_REFRESH_SECONDS, EVENTS_QUEUE_SIZE,
+    EVENTS_BACKEND, EVENTS_RECONNECT_SECONDS, DATABASE_URL
+)
+from database import pin_reads_to_primary
+
+try:
+    import asyncpg
+except ImportError:  # only needed when EVENTS_BACKEND=postgres
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+Feed = Callable[[], Awaitable[dict]]
+Handler = Callable[[Any], None]
+
+# A message on the channel is "<event>\n<json data>" for event streams,
+# "@<topic> <pid>\n<json data>" for the handlers registered with `on`, and
+# an empty one means "something changed, recompute the state feeds"
+CHANGED = ""
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_LIMIT = 7900
+
+def format_event(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+class LocalChannel:
+    """Delivers messages to this process only."""
+
+    async def start(self, deliver: Callable[[str], None], reset: Callable[[], None]):
+        self._deliver = deliver
+
+    def send(self, payload: str):
+        self._deliver(payload)
+
+    async def close(self):
+        pass
+
+class PostgresChannel:
+    """Relays messages between worker processes with LISTEN/NOTIFY.
+
+    Each worker keeps one dedicated asyncpg connection (Prisma cannot
+    LISTEN) that both sends and receives, so a worker gets its own messages
+    back through the same path as everyone else's. After the connection is
+    lost, local subscribers are reset once it is back so they resync from a
+    fresh snapshot instead of silently missing events.
+    """
+
+    def __init__(self, url: Optional[str], channel: str = "library_events"):
+        if asyncpg is None:
+            raise RuntimeError("EVENTS_BACKEND=postgres requires the asyncpg package")
+        if not url:
+            raise RuntimeError("EVENTS_BACKEND=postgres requires DATABASE_URL")
+        # Prisma-only query params (schema, connection_limit, ...) are not
+        # understood by asyncpg.
+        self._url = urlunsplit(urlsplit(url)._replace(query=""))
+        self._channel = channel
+        self._outbox: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Callable[[str], None], reset: Callable[[], None]):
+        self._deliver = deliver
+        self._reset = reset
+        if self._task is None:
+            self._outbox = asyncio.Queue()
+            self._task = asyncio.ensure_future(self._relay())
+
+    def send(self, payload: str):
+        if len(payload.encode()) > NOTIFY_LIMIT:
+            logger.warning("Event of %d bytes is too large for NOTIFY; delivered locally only", len(payload))
+            self._deliver(payload)
+            return
+        self._outbox.put_nowait(payload)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._deliver(payload)
+
+    async def _relay(self):
+        connected_before = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self._url)
+                await connection.add_listener(self._channel, self._on_notify)
+                if connected_before:
+                    self._reset()
+                connected_before = True
+
+                while True:
+                    try:
+                        payload = await asyncio.wait_for(self._outbox.get(), EVENTS_REFRESH_SECONDS)
+                    except asyncio.TimeoutError:
+                        if connection.is_closed():
+                            raise ConnectionError("listener connection closed")
+                        continue
+                    await connection.execute("SELECT pg_notify($1, $2)", self._channel, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Event channel unavailable, retrying: %s", e)
+                await asyncio.sleep(EVENTS_RECONNECT_SECONDS)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+class Broadcaster:
+    """Fan-out of dashboard events to Server-Sent Event streams.
+
+    Writes `publish` events directly and call `changed()` to have the state
+    feeds (overview, current month) recomputed; both travel over the
+    channel so subscribers on every worker see them. Recomputes are
+    debounced and shared by every subscriber of a worker, and only the keys
+    that changed are sent, so the database cost follows the write rate
+    rather than the number of open dashboards. A subscriber that falls
+    EVENTS_QUEUE_SIZE events behind is dropped; its EventSource reconnects
+    and starts from a fresh snapshot.
+
+    The same channel carries `send` messages to the handlers other workers
+    registered with `on`, which is how per-process caches hear about writes
+    made elsewhere. Handlers for "changed" run once per debounce window after
+    a write anywhere, and those for "reset" whenever messages may have been
+    lost.
+    """
+
+    def __init__(self, channel, queue_size: int = EVENTS_QUEUE_SIZE):
+        self._channel = channel
+        self._queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._feeds: Dict[str, Feed] = {}
+        self._state: Dict[str, dict] = {}
+        self._dirty = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._origin = str(os.getpid())
+
+    async def start(self, feeds: Dict[str, Feed]):
+        self._feeds = feeds
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            await self._channel.start(self._deliver, self._reset)
+            self._task = asyncio.ensure_future(self._refresh_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            await self._channel.close()
+        self._drop_all()
+
+    def shutdown(self):
+        """End every open stream; safe to call from a signal handler."""
+        self._closing = True
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._drop_all)
+
+    def publish(self, event: str, data: Any):
+        if self._task is not None:
+            self._channel.send(event + "\n" + orjson.dumps(jsonable_encoder(data)).decode())
+
+    def on(self, topic: str, handler: Handler):
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def send(self, topic: str, data: Any):
+        """Hand `data` to the `topic` handlers of every other worker."""
+        if self._task is not None:
+            self._channel.send(f"@{topic} {self._origin}\n" + orjson.dumps(data).decode())
+
+    def changed(self):
+        # One notice per debounce window is enough for every worker
+        if self._task is not None and not self._dirty.is_set():
+            self._channel.send(CHANGED)
+        self._dirty.set()
+
+    @asynccontextmanager
+    async def subscribe(self):
+        queue: asyncio.Queue = asyncio.Queue(self._queue_size)
+        if self._closing:
+            queue.put_nowait(None)
+            yield queue
+            return
+
+        for name in self._feeds:
+            if name not in self._state:
+                await self._refresh(name)
+            queue.put_nowait(format_event(name, self._state[name]))
+
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def _deliver(self, payload: str):
+        if payload == CHANGED:
+            self._dirty.set()
+            return
+        if payload.startswith("@"):
+            header, _, data = payload.partition("\n")
+            topic, _, origin = header[1:].partition(" ")
+            # The sender has already applied its own message
+            if origin != self._origin:
+                self._dispatch(topic, orjson.loads(data))
+            return
+        event, _, data = payload.partition("\n")
+        self._fan_out(b"event: " + event.encode() + b"\ndata: " + data.encode() + b"\n\n")
+
+    def _fan_out(self, message: bytes):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(queue)
+
+    def _drop(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        # None tells the stream to end
+        queue.put_nowait(None)
+
+    def _dispatch(self, topic: str, data: Any = None):
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(data)
+            except Exception as e:
+                logger.warning("Handling %s message failed: %s", topic, e)
+
+    def _reset(self):
+        self._drop_all()
+        self._dispatch("reset")
+
+    def _drop_all(self):
+        for queue in list(self._subscribers):
+            self._drop(queue)
+        self._state.clear()
+
+    async def _refresh(self, name: str) -> dict:
+        value = jsonable_encoder(await self._feeds[name]())
+        previous = self._state.get(name, {})
+        self._state[name] = value
+        return {key: item for key, item in value.items() if previous.get(key) != item}
+
+    async def _refresh_loop(self):
+        # Feeds must see writes the moment they commit, not after replica lag
+        pin_reads_to_primary()
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), EVENTS_REFRESH_SECONDS)
+                await asyncio.sleep(EVENTS_DEBOUNCE_SECONDS)
+                self._dirty.clear()
+                self._dispatch("changed")
+            except asyncio.TimeoutError:
+                pass
+
+            if not self._subscribers:
+                # Nobody is listening; rebuild from scratch on next subscribe
+                self._state.clear()
+                continue
+
+            for name in self._feeds:
+                try:
+                    delta = await self._refresh(name)
+                except Exception as e:
+                    logger.warning("Refreshing %s feed failed: %s", name, e)
+                    continue
+                # Every worker computes its own feeds, so deltas stay local
+                if delta:
+                    self._fan_out(format_event(name, delta))
+
+def _make_channel():
+    if EVENTS_BACKEND == "memory":
+        return LocalChannel()
+    return PostgresChannel(DATABASE_URL)
+
+broadcaster = Broadcaster(_make_channel())
+
+def _end_streams_on_exit():
+    # Uvicorn waits for open responses to finish before it runs the lifespan
+    # shutdown, so event streams must end when the exit signal arrives, not
+    # in Broadcaster.close()
+    try:
+        from uvicorn.server import Server
+    except ImportError:
+        return
+    handle_exit = Server.handle_exit
+
+    def _handle_exit(server, sig, frame):
+        broadcaster.shutdown()
+        return handle_exit(server, sig, frame)
+
+    Server.handle_exit = _handle_exit
+
+_end_streams_on_exit()
@@ -0,0 +1,92 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Iterable, Literal, Optional
+
+import orjson
+from fastapi.responses import StreamingResponse
+
+from config import EXPORT_CHUNK_SIZE
+from database import read_client
+
+ExportFormat = Literal["csv", "ndjson"]
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+async def iter_rows(model: str, where: Optional[dict] = None,
+                    chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator:
+    """Yield every row of `model` in id order, one keyset query per chunk."""
+    delegate = getattr(read_client(), model)
+    last_id = 0
+    while True:
+        condition = {"id": {"gt": last_id}}
+        rows = await delegate.find_many(
+            where={"AND": [where, condition]} if where else condition,
+            take=chunk_size,
+            order={"id": "asc"}
+        )
+        for row in rows:
+            yield row
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1].id
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+async def _encode(rows: AsyncIterator, columns: Iterable[str], fmt: ExportFormat,
+                  chunk_size: int) -> AsyncIterator[bytes]:
+    columns = list(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(columns)
+
+    pending = 0
+    async for row in rows:
+        if fmt == "csv":
+            writer.writerow([_csv_value(getattr(row, column)) for column in columns])
+        else:
+            buffer.write(orjson.dumps({column: getattr(row, column) for column in columns}).decode())
+            buffer.write("\n")
+
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+async def _gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def stream_export(model: str, columns: Iterable[str], fmt: ExportFormat = "csv",
+                  compress: bool = False, where: Optional[dict] = None,
+                  chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    chunks = _encode(iter_rows(model, where, chunk_size), columns, fmt, chunk_size)
+    return _gzip(chunks) if compress else chunks
+
+def export_response(chunks: AsyncIterator[bytes], name: str, fmt: ExportFormat,
+                    compress: bool) -> StreamingResponse:
+    filename = f"{name}.{fmt}" + (".gz" if compress else "")
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if compress else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import FEE_DAILY_RATE, FEE_GRACE_DAYS, FEE_CAP
+
+SECONDS_PER_DAY = 86400
+
+def epoch_seconds(date: datetime) -> float:
+    # Stored timestamps are naive UTC
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+class FeePolicy:
+    """Rental fee for a loan: every started day kept is charged at
+    `daily_rate`, the first `grace_days` are free and the total is limited
+    to `cap` (0 disables the cap).
+
+    `accrue` evaluates whole arrays of issue times at once; `fee` is the
+    single-loan form used at return time and goes through the same code so
+    both always agree to the cent.
+    """
+
+    def __init__(self, daily_rate: float, grace_days: int, cap: float):
+        self.daily_rate = daily_rate
+        self.grace_days = grace_days
+        self.cap = cap
+
+    def accrue(self, issued_at: np.ndarray, as_of: float) -> np.ndarray:
+        days = np.maximum(np.ceil((as_of - issued_at) / SECONDS_PER_DAY), 1)
+        fees = np.maximum(days - self.grace_days, 0) * self.daily_rate
+        if self.cap > 0:
+            fees = np.minimum(fees, self.cap)
+        return np.round(fees, 2)
+
+    def fee(self, issue_date: datetime, return_date: datetime) -> float:
+        issued_at = np.array([epoch_seconds(issue_date)], dtype=np.float64)
+        return float(self.accrue(issued_at, epoch_seconds(return_date))[0])
+
+fee_policy = FeePolicy(FEE_DAILY_RATE, FEE_GRACE_DAYS, FEE_CAP)
@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Production serving: gunicorn -c gunicorn.conf.py main:app
+#
+# Every worker runs its own event loop and Prisma engine with DB_POOL_SIZE
+# connections (twice that with a replica), so size WEB_CONCURRENCY together
+# with DB_POOL_SIZE to stay below Postgres' max_connections.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers connect to the database in their own lifespan startup, so the app
+# must not be imported (and its clients created) in the master process
+preload_app = False
+
+# Startup warms the pool and caches before the worker accepts requests
+timeout = int(os.environ.get("WORKER_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("KEEPALIVE", 5))
+
+# Recycle workers periodically; the jitter keeps them from restarting together
+max_requests = int(os.environ.get("MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", 1000))
+
+accesslog = "-"
+errorlog = "-"
+
+# Workers write their metrics to files here so /metrics reports the sum over
+# all of them. The directory must be set before workers import
+# prometheus_client and must not hold samples from a previous run.
+if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+else:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="seeker-metrics-")
+
+def child_exit(server, worker):
+    # Drop the live gauges of a worker that has exited or been recycled
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
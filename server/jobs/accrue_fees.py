@@ -0,0 +1,26 @@
+from prisma import Prisma
+
+from services.fee_service import FeeService
+
+async def accrue_fees():
+    """Nightly job: refresh accruedFee on every open loan from the fee policy"""
+    db = Prisma()
+    await db.connect()
+
+    try:
+        report = await FeeService().accrue_fees(client=db)
+        print(
+            f"Evaluated {report['evaluated']} open loans, updated {report['updated']} "
+            f"in {report['seconds']}s"
+        )
+
+    except Exception as e:
+        print(f"Error during fee accrual: {str(e)}")
+        raise e
+
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(accrue_fees())
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from prisma import Json
+
+from config import (
+    JOB_CONCURRENCY, JOB_STORE, REDIS_URL, JOB_TTL_SECONDS, JOB_PROGRESS_INTERVAL_SECONDS
+)
+from database import prisma
+from models import JobInfo
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # only needed when JOB_STORE=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+class PrismaJobStore:
+    """Job state in the Job table, visible to every worker process."""
+
+    async def create(self, kind: str, total: Optional[int]) -> JobInfo:
+        job = await prisma.job.create(data={"kind": kind, "total": total})
+        return JobInfo(**job.__dict__)
+
+    async def update(self, job_id: str, **fields):
+        if fields.get("result") is not None:
+            fields["result"] = Json(fields["result"])
+        await prisma.job.update(where={"id": job_id}, data=fields)
+
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        job = await prisma.job.find_unique(where={"id": job_id})
+        return JobInfo(**job.__dict__) if job else None
+
+class RedisJobStore:
+    """Job state as JSON documents in Redis (or any server speaking its
+    protocol), expiring JOB_TTL_SECONDS after the last update."""
+
+    def __init__(self, url: str = REDIS_URL, ttl: int = JOB_TTL_SECONDS, prefix: str = "job:"):
+        if redis is None:
+            raise RuntimeError("JOB_STORE=redis requires the redis package")
+        self._client = redis.from_url(url)
+        self._ttl = ttl
+        self._prefix = prefix
+
+    async def _save(self, job: JobInfo):
+        await self._client.set(self._prefix + job.id, job.json(), ex=self._ttl)
+
+    async def create(self, kind: str, total: Optional[int]) -> JobInfo:
+        now = datetime.now(timezone.utc)
+        job = JobInfo(
+            id=str(uuid.uuid4()), kind=kind, status="QUEUED", total=total,
+            createdAt=now, updatedAt=now
+        )
+        await self._save(job)
+        return job
+
+    async def update(self, job_id: str, **fields):
+        job = await self.get(job_id)
+        if job is None:
+            return
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.updatedAt = datetime.now(timezone.utc)
+        await self._save(job)
+
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        raw = await self._client.get(self._prefix + job_id)
+        return JobInfo(**json.loads(raw)) if raw else None
+
+class JobContext:
+    """Handed to a running job so it can report progress."""
+
+    def __init__(self, store, job_id: str, total: Optional[int] = None):
+        self.job_id = job_id
+        self.total = total
+        self._store = store
+        self._reported_at = 0.0
+
+    async def progress(self, done: int, total: Optional[int] = None):
+        # Persisted at most every JOB_PROGRESS_INTERVAL_SECONDS, except for
+        # the final update
+        if total is not None:
+            self.total = total
+        now = time.monotonic()
+        if done != self.total and now - self._reported_at < JOB_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._reported_at = now
+
+        fields: Dict[str, Any] = {"progress": done}
+        if total is not None:
+            fields["total"] = total
+        await self._store.update(self.job_id, **fields)
+
+JobFunction = Callable[..., Awaitable[Any]]
+
+class JobQueue:
+    """In-process asyncio job queue with bounded concurrency.
+
+    Jobs run in the worker process that accepted them, at most
+    `concurrency` at a time, while their state is kept in a shared store so
+    `/api/jobs/{id}` can be answered by any worker. A job function receives
+    a JobContext followed by its arguments; its JSON-serializable return
+    value becomes the job result. Jobs still queued or running when the
+    process stops are marked failed.
+    """
+
+    def __init__(self, store, concurrency: int = JOB_CONCURRENCY):
+        self.store = store
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._pending: Dict[str, tuple] = {}
+
+    async def start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.concurrency)]
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+        for job_id in list(self._pending):
+            await self._finish(job_id, status="FAILED", error="Interrupted by shutdown")
+
+    async def submit(self, kind: str, fn: JobFunction, *args, total: Optional[int] = None) -> JobInfo:
+        await self.start()
+        job = await self.store.create(kind, total)
+        self._pending[job.id] = (fn, args, total)
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        return await self.store.get(job_id)
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            fn, args, total = self._pending[job_id]
+            try:
+                await self.store.update(job_id, status="RUNNING")
+                result = await fn(JobContext(self.store, job_id, total), *args)
+                await self._finish(job_id, status="SUCCEEDED", result=result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                await self._finish(job_id, status="FAILED", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _finish(self, job_id: str, **fields):
+        self._pending.pop(job_id, None)
+        try:
+            await self.store.update(job_id, **fields)
+        except Exception as e:
+            logger.warning("Could not record outcome of job %s: %s", job_id, e)
+
+def _make_store():
+    if JOB_STORE == "redis":
+        return RedisJobStore()
+    return PrismaJobStore()
+
+job_queue = JobQueue(_make_store())
@@ -0,0 +1,25 @@
+from prisma import Prisma
+
+from services.debt_ledger import reconcile_balances
+
+async def reconcile_debt():
+    """Recompute every Member.outstandingDebt from the DebtEntry ledger in one statement"""
+    db = Prisma()
+    await db.connect()
+
+    try:
+        async with db.tx() as transaction:
+            members = await reconcile_balances(transaction)
+
+        print(f"Corrected outstanding debt for {members} members")
+
+    except Exception as e:
+        print(f"Error during reconciliation: {str(e)}")
+        raise e
+
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(reconcile_debt())
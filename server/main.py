@@ -1,16 +1,69 @@
-from fastapi import FastAPI
+import time
+from datetime import datetime
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from routers.book import router as book_router
+from routers.book import router as book_router, book_service
 from routers.member import router as member_router
-from routers.transaction import router as transaction_router
-from database import prisma
+from routers.transaction import router as transaction_router, transaction_service
+from routers.events import router as events_router
+from routers.job import router as job_router
+from config import SLOW_REQUEST_MS, READ_YOUR_WRITES_SECONDS
+from database import prisma, replica, pin_reads_to_primary, warm_pool
+import metrics
+from services.frappe_client import frappe_client
+from services.search_service import book_search
+from jobs.queue import job_queue
+from events import broadcaster
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+async def current_month():
+    today = datetime.now()
+    return (await transaction_service.get_monthly_data(today.year, today.month, today.month))[0]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Application starting up")
+    app.state.ready = False
+    await prisma.connect()
+    if replica is not None:
+        await replica.connect()
+    logger.info("Connected to database")
+    await frappe_client.start()
+    await job_queue.start()
+
+    # Open the pool and fill the caches before the load balancer sends traffic
+    await warm_pool()
+    await book_service.get_overview()
+    await book_search.warm()
+    await broadcaster.start({"overview": book_service.refresh_overview, "monthly": current_month})
+    app.state.ready = True
+    logger.info("Ready to serve requests")
+
+    yield
+
+    logger.info("Application shutting down")
+    app.state.ready = False
+    await broadcaster.close()
+    await job_queue.close()
+    await frappe_client.close()
+    await prisma.disconnect()
+    if replica is not None:
+        await replica.disconnect()
+    logger.info("Disconnected from database")
+
+# Writes answer with a token (unix time) that the client sends back on later
+# requests; until then its reads stay on the primary and skip the per-worker
+# caches. The token carries the state, so it works across workers and for
+# server-side callers without a cookie jar.
+READ_AFTER_HEADER = "X-Read-After"
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -19,21 +72,91 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[READ_AFTER_HEADER],
 )
 
+# Scrapes, load balancer probes and long-lived event streams would otherwise
+# dominate the request metrics
+UNMETERED_PATHS = ("/metrics", "/healthz", "/readyz", "/api/events")
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    if request.url.path in UNMETERED_PATHS:
+        return await call_next(request)
+
+    metrics.IN_FLIGHT.inc()
+    stats = metrics.start_request()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.IN_FLIGHT.dec()
+
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.REQUEST_LATENCY.labels(request.method, path).observe(elapsed)
+        metrics.REQUESTS.labels(request.method, path, status).inc()
+        metrics.REQUEST_QUERIES.labels(request.method, path).observe(stats["count"])
+
+        if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+            breakdown = ", ".join(
+                f"{operation}={count} ({seconds * 1000:.1f}ms)"
+                for operation, (count, seconds) in stats["operations"].items()
+            )
+            logger.warning(
+                "Slow request %s %s: %d in %.1fms, %d queries (%.1fms): %s",
+                request.method, path, status, elapsed * 1000,
+                stats["count"], stats["seconds"] * 1000, breakdown or "none"
+            )
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def _read_after(request: Request) -> float:
+    try:
+        return float(request.headers.get(READ_AFTER_HEADER, 0))
+    except ValueError:
+        return 0
+
+@app.middleware("http")
+async def route_reads(request: Request, call_next):
+    # Writes, and reads shortly after a write by the same client, use the
+    # primary and bypass caches so neither replication lag nor another
+    # worker's cache hides the client's own changes
+    wrote = request.method not in SAFE_METHODS
+    if wrote or _read_after(request) > time.time():
+        pin_reads_to_primary()
+
+    response = await call_next(request)
+    if wrote and response.status_code < 400:
+        response.headers[READ_AFTER_HEADER] = str(int(time.time() + READ_YOUR_WRITES_SECONDS))
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    if not app.state.ready:
+        return ORJSONResponse({"status": "starting"}, status_code=503)
+    try:
+        await prisma.query_raw("SELECT 1")
+    except Exception as e:
+        logger.warning("Readiness check failed: %s", e)
+        return ORJSONResponse({"status": "database unavailable"}, status_code=503)
+    return {"status": "ready"}
+
 # Include routers
 app.include_router(book_router)
 app.include_router(member_router)
 app.include_router(transaction_router)
-
-@app.on_event("startup")
-async def startup():
-    logger.info("Application starting up")
-    await prisma.connect()
-    logger.info("Connected to database")
-
-@app.on_event("shutdown")
-async def shutdown():
-    logger.info("Application shutting down")
-    await prisma.disconnect()
-    logger.info("Disconnected from database")
\ No newline at end of file
+app.include_router(job_router)
+app.include_router(events_router)
@@ -0,0 +1,95 @@
+import functools
+import logging
+import os
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+logger = logging.getLogger(__name__)
+
+# Under gunicorn every worker keeps its own samples; with
+# PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py does this) they are written
+# to files there and /metrics, whichever worker serves it, adds up all of them.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100)
+
+REQUEST_LATENCY = Histogram(
+    "seeker_http_request_duration_seconds", "HTTP request latency", ("method", "route"),
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    "seeker_http_requests_total", "HTTP requests by status", ("method", "route", "status")
+)
+IN_FLIGHT = Gauge(
+    "seeker_http_requests_in_flight", "HTTP requests currently being served", multiprocess_mode="livesum"
+)
+REQUEST_QUERIES = Histogram(
+    "seeker_http_request_db_queries", "Database queries issued per HTTP request",
+    ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+)
+QUERY_LATENCY = Histogram(
+    "seeker_db_query_duration_seconds", "Database query latency by Prisma operation",
+    ("operation",), buckets=QUERY_BUCKETS
+)
+QUERY_ERRORS = Counter("seeker_db_query_errors_total", "Failed database queries", ("operation",))
+
+_request_queries: ContextVar[Optional[dict]] = ContextVar("request_queries", default=None)
+
+def start_request() -> dict:
+    """Begin collecting query stats for the current request."""
+    stats = {"count": 0, "seconds": 0.0, "operations": defaultdict(lambda: [0, 0.0])}
+    _request_queries.set(stats)
+    return stats
+
+def record_query(operation: str, seconds: float, failed: bool = False):
+    QUERY_LATENCY.labels(operation).observe(seconds)
+    if failed:
+        QUERY_ERRORS.labels(operation).inc()
+
+    stats = _request_queries.get()
+    if stats is not None:
+        stats["count"] += 1
+        stats["seconds"] += seconds
+        stats["operations"][operation][0] += 1
+        stats["operations"][operation][1] += seconds
+
+def instrument_client(client_class):
+    """Time every query sent through Prisma clients of `client_class`.
+
+    The hook sits on the class, so transaction clients created by
+    `prisma.tx()` are counted as well.
+    """
+    execute = getattr(client_class, "_execute", None)
+    if execute is None or getattr(execute, "_instrumented", False):
+        if execute is None:
+            logger.warning("Prisma client has no _execute hook; query metrics are disabled")
+        return
+
+    @functools.wraps(execute)
+    async def timed_execute(self, *args, **kwargs):
+        operation = str(kwargs.get("method") or (args[0] if args else "query"))
+        started = time.perf_counter()
+        try:
+            result = await execute(self, *args, **kwargs)
+        except Exception:
+            record_query(operation, time.perf_counter() - started, failed=True)
+            raise
+        record_query(operation, time.perf_counter() - started)
+        return result
+
+    timed_execute._instrumented = True
+    client_class._execute = timed_execute
+
+def render() -> bytes:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
@@ -0,0 +1,33 @@
+from prisma import Prisma
+
+# Indexes declared in schema.prisma, named the way Prisma names them so a
+# later `prisma db push` treats them as already applied. CONCURRENTLY keeps
+# the tables writable while large indexes build.
+INDEXES = [
+    ("Book_createdAt_id_idx", 'ON "Book" ("createdAt", "id")'),
+    ("Member_createdAt_id_idx", 'ON "Member" ("createdAt", "id")'),
+    ("Transaction_createdAt_id_idx", 'ON "Transaction" ("createdAt", "id")'),
+    ("Transaction_memberId_createdAt_id_idx", 'ON "Transaction" ("memberId", "createdAt", "id")'),
+    ("Transaction_bookId_idx", 'ON "Transaction" ("bookId")'),
+]
+
+async def add_indexes():
+    """Create missing list and lookup indexes without locking out writes"""
+    db = Prisma()
+    await db.connect()
+
+    try:
+        for name, definition in INDEXES:
+            await db.execute_raw(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" {definition}')
+            print(f"Index {name} ready")
+
+    except Exception as e:
+        print(f"Error creating indexes: {str(e)}")
+        raise e
+
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(add_indexes())
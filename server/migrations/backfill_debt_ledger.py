@@ -0,0 +1,35 @@
+from prisma import Prisma
+
+from services.debt_ledger import LEDGER_BALANCES, LOCK_MEMBERS
+
+OPENING_BALANCES = f"""
+    INSERT INTO "DebtEntry" ("memberId", "type", "amount", "createdAt")
+    SELECT m."id", 'ADJUSTMENT'::"DebtEntryType", m."outstandingDebt" - ledger."balance", NOW()
+    FROM "Member" AS m
+    JOIN ({LEDGER_BALANCES}) AS ledger ON ledger."id" = m."id"
+    WHERE ROUND((m."outstandingDebt" - ledger."balance")::numeric, 2) <> 0
+"""
+
+async def backfill_debt_ledger():
+    """Record an opening ADJUSTMENT for debt that predates the ledger, so every
+    member's ledger sums to their current outstandingDebt"""
+    db = Prisma()
+    await db.connect()
+
+    try:
+        async with db.tx() as transaction:
+            await transaction.execute_raw(LOCK_MEMBERS)
+            members = await transaction.execute_raw(OPENING_BALANCES)
+
+        print(f"Recorded opening balances for {members} members")
+
+    except Exception as e:
+        print(f"Error during backfill: {str(e)}")
+        raise e
+
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(backfill_debt_ledger())
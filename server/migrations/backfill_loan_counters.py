@@ -0,0 +1,51 @@
+from prisma import Prisma
+
+OPEN_LOANS = """
+    SELECT issue."id", issue."bookId", issue."memberId"
+    FROM "Transaction" AS issue
+    LEFT JOIN "Transaction" AS ret ON ret."relatedTransactionId" = issue."id"
+    WHERE issue."type" = 'ISSUE' AND ret."id" IS NULL
+"""
+
+MEMBER_COUNTERS = f"""
+    UPDATE "Member" AS m
+    SET "activeLoanCount" = COALESCE(loans."count", 0)
+    FROM "Member" AS target
+    LEFT JOIN (
+        SELECT "memberId", COUNT(*) AS "count" FROM ({OPEN_LOANS}) AS open GROUP BY "memberId"
+    ) AS loans ON loans."memberId" = target."id"
+    WHERE m."id" = target."id" AND m."activeLoanCount" IS DISTINCT FROM COALESCE(loans."count", 0)
+"""
+
+BOOK_COUNTERS = f"""
+    UPDATE "Book" AS b
+    SET "onLoanCount" = COALESCE(loans."count", 0)
+    FROM "Book" AS target
+    LEFT JOIN (
+        SELECT "bookId", COUNT(*) AS "count" FROM ({OPEN_LOANS}) AS open GROUP BY "bookId"
+    ) AS loans ON loans."bookId" = target."id"
+    WHERE b."id" = target."id" AND b."onLoanCount" IS DISTINCT FROM COALESCE(loans."count", 0)
+"""
+
+async def backfill_loan_counters():
+    """Recompute Member.activeLoanCount and Book.onLoanCount from open ISSUE transactions"""
+    db = Prisma()
+    await db.connect()
+
+    try:
+        async with db.tx() as transaction:
+            members = await transaction.execute_raw(MEMBER_COUNTERS)
+            books = await transaction.execute_raw(BOOK_COUNTERS)
+
+        print(f"Updated loan counters for {members} members and {books} books")
+
+    except Exception as e:
+        print(f"Error during backfill: {str(e)}")
+        raise e
+
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(backfill_loan_counters())
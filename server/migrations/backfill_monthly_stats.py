@@ -0,0 +1,37 @@
+from prisma import Prisma
+
+REBUILD_QUERY = """
+    INSERT INTO "MonthlyStat" ("month", "loans", "returns", "updatedAt")
+    SELECT date_trunc('month', activity."date"), SUM(activity."loans"), SUM(activity."returns"), NOW()
+    FROM (
+        SELECT "issueDate" AS "date", 1 AS "loans", 0 AS "returns"
+        FROM "Transaction" WHERE "type" = 'ISSUE'
+        UNION ALL
+        SELECT "returnDate", 0, 1
+        FROM "Transaction" WHERE "type" = 'RETURN' AND "returnDate" IS NOT NULL
+    ) AS activity
+    GROUP BY 1
+"""
+
+async def backfill_monthly_stats():
+    """Rebuild the MonthlyStat rollup from the transaction ledger"""
+    db = Prisma()
+    await db.connect()
+
+    try:
+        async with db.tx() as transaction:
+            await transaction.execute_raw('DELETE FROM "MonthlyStat"')
+            months = await transaction.execute_raw(REBUILD_QUERY)
+
+        print(f"Rebuilt monthly stats for {months} months")
+
+    except Exception as e:
+        print(f"Error during backfill: {str(e)}")
+        raise e
+
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(backfill_monthly_stats())
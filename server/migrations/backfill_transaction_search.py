@@ -0,0 +1,21 @@
+from prisma import Prisma
+
+from migrations.runner import parse_args, run_migration
+from services.ledger_search import SEARCH_TEXT
+
+STAMP_RANGE = f"""
+    UPDATE "Transaction" AS t
+    SET "searchText" = {SEARCH_TEXT}
+    FROM "Book" AS b, "Member" AS m
+    WHERE t."bookId" = b."id" AND t."memberId" = m."id"
+    AND t."searchText" IS NULL AND t."id" >= $1 AND t."id" < $2
+"""
+
+async def stamp_batch(db: Prisma, start_id: int, end_id: int) -> int:
+    """Populate Transaction.searchText for one id range of older rows"""
+    return await db.execute_raw(STAMP_RANGE, start_id, end_id)
+
+if __name__ == "__main__":
+    import asyncio
+    args = parse_args("Populate Transaction.searchText for rows written before ledger search existed")
+    asyncio.run(run_migration("backfill_transaction_search", "Transaction", stamp_batch, args))
@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from prisma import Prisma
+
+STATE_DIR = Path(__file__).parent / ".state"
+
+# Migrates rows with start_id <= id < end_id and returns how many it touched.
+# Batches must be idempotent: a batch that committed just before a crash is
+# run again on resume.
+BatchFn = Callable[[Prisma, int, int], Awaitable[int]]
+
+class MigrationRunner:
+    """Runs a data migration in id-range batches with checkpointed progress.
+
+    Completed batches are recorded in `migrations/.state/<name>.json`, so an
+    interrupted run resumes where it stopped. Up to `workers` batches run
+    concurrently; the Prisma connection pool should allow at least that many
+    connections.
+
+    Migrations built on it are run from the server directory as modules:
+
+        python -m migrations.update_transactions --workers 8 --batch-size 10000
+    """
+
+    def __init__(self, name: str, table: str, batch: BatchFn, batch_size: int = 5000,
+                 workers: int = 4, state_dir: Path = STATE_DIR):
+        self.name = name
+        self.table = table
+        self.batch = batch
+        self.batch_size = batch_size
+        self.workers = workers
+        self.state_path = state_dir / f"{name}.json"
+
+    def _load_state(self) -> set:
+        if not self.state_path.exists():
+            return set()
+
+        state = json.loads(self.state_path.read_text())
+        if state.get("batch_size") != self.batch_size:
+            raise ValueError(
+                f"Checkpoint for {self.name} was written with batch size {state.get('batch_size')}; "
+                f"rerun with that size or pass --reset"
+            )
+        return set(state["done"])
+
+    def _save_state(self, done: set):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"batch_size": self.batch_size, "done": sorted(done)}))
+        os.replace(tmp_path, self.state_path)
+
+    def reset(self):
+        if self.state_path.exists():
+            self.state_path.unlink()
+
+    async def run(self, db: Prisma):
+        bounds = await db.query_raw(f'SELECT MIN("id") AS "low", MAX("id") AS "high" FROM "{self.table}"')
+        low, high = bounds[0]["low"], bounds[0]["high"]
+        if low is None:
+            print(f"[{self.name}] {self.table} is empty, nothing to migrate")
+            return
+
+        done = self._load_state()
+        starts = [
+            start for start in range(int(low), int(high) + 1, self.batch_size)
+            if start not in done
+        ]
+        total_batches = len(starts) + len(done)
+        print(f"[{self.name}] {len(starts)} of {total_batches} batches remaining "
+              f"(ids {low}..{high}, batch size {self.batch_size}, {self.workers} workers)")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for start in starts:
+            queue.put_nowait(start)
+
+        started_at = time.monotonic()
+        progress = {"rows": 0, "batches": 0}
+        lock = asyncio.Lock()
+
+        async def worker():
+            while True:
+                try:
+                    start = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                try:
+                    rows = await self.batch(db, start, start + self.batch_size)
+                except Exception:
+                    # Let in-flight batches finish, but start no new ones.
+                    while not queue.empty():
+                        queue.get_nowait()
+                    raise
+
+                async with lock:
+                    done.add(start)
+                    self._save_state(done)
+                    progress["rows"] += rows
+                    progress["batches"] += 1
+                    self._report(progress, len(starts), started_at)
+
+        outcomes = await asyncio.gather(
+            *(worker() for _ in range(max(1, self.workers))), return_exceptions=True
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                print(f"[{self.name}] Migration stopped after {progress['batches']} batches; "
+                      f"rerun to resume: {outcome}")
+                raise outcome
+
+        print(f"[{self.name}] Migration completed: {progress['rows']} rows "
+              f"in {time.monotonic() - started_at:.1f}s")
+
+    def _report(self, progress: dict, batches: int, started_at: float):
+        elapsed = max(time.monotonic() - started_at, 1e-9)
+        rate = progress["rows"] / elapsed
+        eta = (batches - progress["batches"]) * elapsed / progress["batches"]
+        print(f"[{self.name}] {progress['batches']}/{batches} batches, "
+              f"{progress['rows']} rows, {rate:.0f} rows/s, ETA {eta:.0f}s")
+
+def parse_args(description: str, argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--reset", action="store_true", help="discard saved progress and start over")
+    return parser.parse_args(argv)
+
+async def run_migration(name: str, table: str, batch: BatchFn, args):
+    runner = MigrationRunner(name, table, batch, args.batch_size, args.workers)
+    if args.reset:
+        runner.reset()
+
+    db = Prisma()
+    await db.connect()
+    try:
+        await runner.run(db)
+    finally:
+        await db.disconnect()
@@ -1,59 +1,42 @@
 from prisma import Prisma
-from datetime import datetime
 
-async def migrate_transactions():
-    """Convert existing transactions to the new ledger system"""
-    db = Prisma()
-    await db.connect()
-
-    try:
-        async with db.tx() as transaction:
-            old_transactions = await db.transaction.find_many(
-                where={
-                    "type": None  
-                },
-                include={
-                    "book": True,
-                    "member": True
-                }
-            )
-
-            print(f"Found {len(old_transactions)} transactions to migrate")
-
-            for old_tx in old_transactions:
-                # Create ISSUE transaction
-                issue_tx = await db.transaction.update(
-                    where={"id": old_tx.id},
-                    data={
-                        "type": "ISSUE",
-                        "issueDate": old_tx.issueDate,
-                        "bookId": old_tx.bookId,
-                        "memberId": old_tx.memberId,
-                    }
-                )
-
-                if old_tx.returnDate:
-                    await db.transaction.create(
-                        data={
-                            "type": "RETURN",
-                            "bookId": old_tx.bookId,
-                            "memberId": old_tx.memberId,
-                            "issueDate": old_tx.issueDate,
-                            "returnDate": old_tx.returnDate,
-                            "rentFee": old_tx.rentFee,
-                            "relatedTransactionId": issue_tx.id
-                        }
-                    )
-
-            print("Migration completed successfully")
-
-    except Exception as e:
-        print(f"Error during migration: {str(e)}")
-        raise e
-
-    finally:
-        await db.disconnect()
+from migrations.runner import parse_args, run_migration
+
+async def migrate_batch(db: Prisma, start_id: int, end_id: int) -> int:
+    """Convert one id range of untyped transactions to the ledger system"""
+    old_transactions = await db.transaction.find_many(
+        where={
+            "type": None,
+            "id": {"gte": start_id, "lt": end_id}
+        }
+    )
+    if not old_transactions:
+        return 0
+
+    returns = [
+        {
+            "type": "RETURN",
+            "bookId": old_tx.bookId,
+            "memberId": old_tx.memberId,
+            "issueDate": old_tx.issueDate,
+            "returnDate": old_tx.returnDate,
+            "rentFee": old_tx.rentFee,
+            "relatedTransactionId": old_tx.id
+        }
+        for old_tx in old_transactions if old_tx.returnDate
+    ]
+
+    async with db.tx() as transaction:
+        await transaction.transaction.update_many(
+            where={"id": {"in": [old_tx.id for old_tx in old_transactions]}},
+            data={"type": "ISSUE"}
+        )
+        if returns:
+            await transaction.transaction.create_many(data=returns)
+
+    return len(old_transactions)
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(migrate_transactions()) 
\ No newline at end of file
+    args = parse_args("Convert existing transactions to the new ledger system")
+    asyncio.run(run_migration("update_transactions", "Transaction", migrate_batch, args))
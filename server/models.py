@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List
 from pydantic import BaseModel, EmailStr, Field
 from enum import Enum
 
@@ -13,6 +13,7 @@ class Book(BaseModel):
     author: str
     isbn: str
     quantity: int
+    onLoanCount: int = 0
     publisher: Optional[str] = None
     imageUrl: Optional[str] = None
     createdAt: datetime
@@ -27,12 +28,18 @@ class Member(BaseModel):
     email: str
     address: Optional[str] = None
     outstandingDebt: float = 0
+    activeLoanCount: int = 0
     createdAt: datetime
     updatedAt: datetime
 
     class Config:
         from_attributes = True
 
+class MemberWithSummary(Member):
+    totalLoans: int = 0
+    lastActivity: Optional[datetime] = None
+    overdueCount: int = 0
+
 class TransactionCreate(BaseModel):
     bookId: int = Field(..., description="ID of the book to be issued")
     memberId: int = Field(..., description="ID of the member borrowing the book")
@@ -40,9 +47,35 @@ class TransactionCreate(BaseModel):
 
 class TransactionReturn(BaseModel):
     return_date: datetime = Field(..., description="Date when the book is returned")
-    rent_fee: float = Field(..., ge=0, description="Fee charged for the rental period")
+    rent_fee: Optional[float] = Field(default=None, ge=0, description="Fee charged for the rental period; computed from the fee policy when omitted")
+    add_to_debt: bool = Field(default=False, description="Whether to add the fee to member's debt")
+
+class BatchIssueRequest(BaseModel):
+    memberId: int = Field(..., description="ID of the member borrowing the books")
+    bookIds: List[int] = Field(..., description="IDs of the books to issue, one entry per copy")
+    issueDate: datetime = Field(default_factory=datetime.now, description="Date when the books are issued")
+
+class BatchReturnItem(BaseModel):
+    transactionId: int = Field(..., description="ID of the ISSUE transaction being returned")
+    rent_fee: Optional[float] = Field(default=None, ge=0, description="Fee charged for the rental period; computed from the fee policy when omitted")
     add_to_debt: bool = Field(default=False, description="Whether to add the fee to member's debt")
 
+class BatchReturnRequest(BaseModel):
+    return_date: datetime = Field(..., description="Date when the books are returned")
+    items: List[BatchReturnItem]
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: str
+    bookId: Optional[int] = None
+    transactionId: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
 class MemberCreate(BaseModel):
     name: str
     email: EmailStr
@@ -52,8 +85,26 @@ class BookCreate(BaseModel):
     title: str
     author: str
     isbn: str
+    # Copies owned; Book.quantity is what remains on the shelf once the
+    # copies on loan are taken off
     quantity: int
     publisher: Optional[str] = None
+    imageUrl: Optional[str] = None
+
+class ImportRowResult(BaseModel):
+    row: int
+    isbn: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class ImportReport(BaseModel):
+    total: int
+    imported: int
+    created: int
+    updated: int
+    skipped: int
+    errors: int
+    results: List[ImportRowResult]
 
 class Transaction(BaseModel):
     id: int
@@ -63,6 +114,7 @@ class Transaction(BaseModel):
     issueDate: datetime
     returnDate: Optional[datetime] = None
     rentFee: Optional[float] = None
+    accruedFee: float = 0
     relatedTransactionId: Optional[int] = None
     relatedTransaction: Optional['Transaction'] = None
     relatedReturns: List['Transaction'] = []
@@ -74,6 +126,24 @@ class Transaction(BaseModel):
     class Config:
         from_attributes = True
 
+class BookSummary(BaseModel):
+    id: int
+    title: str
+    author: str
+    isbn: str
+
+class MemberSummary(BaseModel):
+    id: int
+    name: str
+    email: str
+
+class TransactionSummary(BaseModel):
+    id: int
+    type: TransactionType
+    issueDate: datetime
+    returnDate: Optional[datetime] = None
+    rentFee: Optional[float] = None
+
 class PaginatedResponse(BaseModel):
     items: List[Transaction]
     total: int
@@ -81,6 +151,17 @@ class PaginatedResponse(BaseModel):
     size: int
     pages: int
 
+class JobInfo(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: int = 0
+    total: Optional[int] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    createdAt: datetime
+    updatedAt: datetime
+
 class FrappeBook(BaseModel):
     title: str
     authors: str
@@ -0,0 +1,117 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Literal
+
+from cache import TTLCache
+from config import COUNT_CACHE_TTL_SECONDS, COUNT_CACHE_SIZE
+from database import read_client
+from exceptions import ValidationException
+
+TotalMode = Literal["exact", "approximate", "none"]
+
+KEYSET_ORDER = [{"createdAt": "desc"}, {"id": "desc"}]
+
+_count_cache = TTLCache(COUNT_CACHE_SIZE, COUNT_CACHE_TTL_SECONDS)
+
+def encode_cursor(item) -> str:
+    raw = json.dumps([item.createdAt.isoformat(), item.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError):
+        raise ValidationException("Invalid cursor")
+
+def keyset_where(where: dict, cursor: Optional[str]) -> dict:
+    if not cursor:
+        return where
+
+    created_at, item_id = decode_cursor(cursor)
+    after_cursor = {
+        "OR": [
+            {"createdAt": {"lt": created_at}},
+            {"createdAt": created_at, "id": {"lt": item_id}}
+        ]
+    }
+    return {"AND": [where, after_cursor]} if where else after_cursor
+
+async def count_total(model: str, where: dict, mode: TotalMode) -> Optional[int]:
+    """Count rows for a list response.
+
+    "exact" always runs count(); "approximate" uses the planner's row
+    estimate for unfiltered lists and a short-lived cached count otherwise;
+    "none" skips counting entirely.
+    """
+    if mode == "none":
+        return None
+
+    client = read_client()
+    delegate = getattr(client, model)
+    if mode == "exact":
+        return await delegate.count(where=where)
+
+    key = (model, json.dumps(where, sort_keys=True, default=str))
+    total = _count_cache.get(key)
+    if total is not None:
+        return total
+
+    if not where:
+        rows = await client.query_raw(
+            "SELECT reltuples::bigint AS estimate FROM pg_class WHERE relname = $1",
+            model.capitalize()
+        )
+        if rows and int(rows[0]["estimate"]) >= 0:
+            total = int(rows[0]["estimate"])
+
+    if total is None:
+        total = await delegate.count(where=where)
+
+    _count_cache.set(key, total)
+    return total
+
+async def offset_page(model: str, where: dict, page: int, limit: int,
+                      total: TotalMode = "exact", **find_args):
+    count = await count_total(model, where, "exact" if total == "none" else total)
+    items = await getattr(read_client(), model).find_many(
+        where=where,
+        skip=(page - 1) * limit,
+        take=limit,
+        order={"createdAt": "desc"},
+        **find_args
+    )
+
+    return {
+        "items": items,
+        "total": count,
+        "page": page,
+        "size": limit,
+        "pages": (count + limit - 1) // limit
+    }
+
+async def keyset_page(model: str, where: dict, cursor: Optional[str], limit: int,
+                      total: TotalMode = "none", **find_args):
+    """Fetch one page ordered by (createdAt, id) descending.
+
+    The cost of a page does not depend on how deep into the list it is;
+    pass the returned `next_cursor` back to fetch the following page.
+    """
+    items = await getattr(read_client(), model).find_many(
+        where=keyset_where(where, cursor),
+        take=limit + 1,
+        order=KEYSET_ORDER,
+        **find_args
+    )
+
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1]) if has_more else None,
+        "total": await count_total(model, where, total),
+        "size": limit
+    }
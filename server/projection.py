@@ -0,0 +1,92 @@
+from typing import Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel
+
+from exceptions import ValidationException
+from models import BookSummary, MemberSummary, TransactionSummary
+
+BOOK_FIELDS = (
+    "id", "title", "author", "isbn", "quantity", "onLoanCount",
+    "publisher", "imageUrl", "createdAt", "updatedAt"
+)
+MEMBER_FIELDS = (
+    "id", "name", "email", "address", "outstandingDebt", "activeLoanCount",
+    "createdAt", "updatedAt"
+)
+MEMBER_SUMMARY_FIELDS = MEMBER_FIELDS + ("totalLoans", "lastActivity", "overdueCount")
+TRANSACTION_FIELDS = (
+    "id", "type", "bookId", "memberId", "issueDate", "returnDate", "rentFee", "accruedFee",
+    "relatedTransactionId", "createdAt", "updatedAt"
+)
+
+# Compact shape each expandable relation is rendered with in lean responses
+TRANSACTION_RELATIONS: Dict[str, Type[BaseModel]] = {
+    "book": BookSummary,
+    "member": MemberSummary,
+    "relatedTransaction": TransactionSummary,
+    "relatedTo": TransactionSummary,
+}
+
+def _field_names(model: Type[BaseModel]) -> Iterable[str]:
+    return getattr(model, "model_fields", None) or model.__fields__
+
+def parse_list(value: Optional[str], allowed: Iterable[str], name: str) -> Optional[List[str]]:
+    if value is None:
+        return None
+
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = set(items) - set(allowed)
+    if unknown:
+        raise ValidationException(f"Unknown {name}: {', '.join(sorted(unknown))}")
+    return items
+
+class Projection:
+    """Trims list/detail responses to requested fields and relations.
+
+    `fields` selects scalar columns (id is always kept) and `expand` selects
+    which relations are loaded. Only the requested relations are fetched
+    from the database, and each one is rendered with its compact summary
+    model. With neither parameter given the full models are returned
+    unchanged.
+    """
+
+    def __init__(self, fields: Optional[str], expand: Optional[str],
+                 scalars: Iterable[str], relations: Optional[Dict[str, Type[BaseModel]]] = None):
+        relations = relations or {}
+        self.scalars = tuple(scalars)
+        self.fields = parse_list(fields, self.scalars, "fields")
+        self.expand = parse_list(expand, relations, "expand")
+        self.relations = relations
+
+    @property
+    def lean(self) -> bool:
+        return self.fields is not None or self.expand is not None
+
+    def include(self, default: Optional[dict] = None) -> Optional[dict]:
+        if not self.lean:
+            return default
+        if not self.expand:
+            return None
+        return {relation: True for relation in self.expand}
+
+    def apply(self, item):
+        if not self.lean or item is None:
+            return item
+
+        fields = self.fields if self.fields is not None else self.scalars
+        data = {"id": item.id}
+        for field in fields:
+            data[field] = getattr(item, field)
+
+        for relation in self.expand or []:
+            value = getattr(item, relation, None)
+            summary = self.relations[relation]
+            data[relation] = None if value is None else summary(**{
+                name: getattr(value, name) for name in _field_names(summary)
+            })
+        return data
+
+    def apply_page(self, page: dict) -> dict:
+        if self.lean:
+            page["items"] = [self.apply(item) for item in page["items"]]
+        return page
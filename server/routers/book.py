@@ -1,14 +1,17 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Optional, List, Union
 from services.book_service import BookService
+from services.import_service import ConflictMode, ImportFormat
+from services.transaction_service import TransactionService
 from exceptions import LibraryException, ResourceNotFoundException
-from models import Book, PaginatedResponse, FrappeBook, BookCreate, MonthlyData
-from datetime import datetime, timedelta
-
-from database import prisma
+from models import Book, PaginatedResponse, FrappeBook, BookCreate, MonthlyData, ImportReport, JobInfo
+from export import ExportFormat, export_response
+from pagination import TotalMode
+from conditional import conditional
 
 router = APIRouter(prefix="/api/books", tags=["books"])
 book_service = BookService()
+transaction_service = TransactionService()
 
 @router.get("/overview")
 async def get_overview():
@@ -19,6 +22,28 @@ async def get_overview():
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/monthly-data")
+async def get_monthly_data(
+    year: Optional[int] = Query(default=None, ge=1900),
+    start_month: int = Query(default=1, ge=1, le=12),
+    end_month: int = Query(default=12, ge=1, le=12)
+):
+    try:
+        return await transaction_service.get_monthly_data(year, start_month, end_month)
+    except LibraryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/export")
+async def export_books(format: ExportFormat = "csv", gzip: bool = False):
+    try:
+        return export_response(book_service.export_books(format, gzip), "books", format, gzip)
+    except LibraryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/search/frappe")
 async def search_frappe_books(
     title: Optional[str] = None,
@@ -36,21 +61,26 @@ async def search_frappe_books(
 
 @router.get("")
 async def get_books(
+    request: Request,
+    response: Response,
     search: Optional[str] = None,
     page: int = Query(default=1, ge=1),
-    limit: int = Query(default=20, ge=1)
+    limit: int = Query(default=20, ge=1),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None
 ):
     try:
-        return await book_service.get_books(search, page, limit)
+        return conditional(request, response, await book_service.get_books(search, page, limit, cursor, total, fields))
     except LibraryException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/{book_id}")
-async def get_book_by_id(book_id: int):
+async def get_book_by_id(request: Request, response: Response, book_id: int, fields: Optional[str] = None):
     try:
-        return await book_service.get_book_by_id(book_id)
+        return conditional(request, response, await book_service.get_book_by_id(book_id, fields))
     except ResourceNotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
     except LibraryException as e:
@@ -67,10 +97,45 @@ async def create_book(book: BookCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.post("/import-multiple")
-async def import_multiple_books(books: List[BookCreate]):
+@router.post("/import-multiple", response_model=Union[ImportReport, JobInfo])
+async def import_multiple_books(
+    books: List[BookCreate],
+    response: Response,
+    on_conflict: ConflictMode = "skip",
+    background: bool = False
+):
     try:
-        return await book_service.import_multiple_books(books)
+        if background:
+            response.status_code = 202
+            return await book_service.queue_import(books, on_conflict)
+        return await book_service.import_multiple_books(books, on_conflict)
+    except LibraryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/import-stream", response_model=Union[ImportReport, JobInfo])
+async def import_books_stream(
+    request: Request,
+    response: Response,
+    format: ImportFormat = "ndjson",
+    on_conflict: ConflictMode = "skip",
+    background: bool = False
+):
+    try:
+        if background:
+            response.status_code = 202
+            return await book_service.queue_import_stream(request.stream(), format, on_conflict)
+        return await book_service.import_books_stream(request.stream(), format, on_conflict)
+    except LibraryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/enrich", response_model=JobInfo, status_code=202)
+async def enrich_books():
+    try:
+        return await book_service.queue_enrichment()
     except LibraryException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -97,43 +162,3 @@ async def delete_book(book_id: int):
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
-
-@router.get("/monthly-data")
-async def get_monthly_data():
-    start_of_year = datetime.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-    months = [
-        {
-            "name": (start_of_year + timedelta(days=30*i)).strftime("%b"),
-            "start": start_of_year + timedelta(days=30*i),
-            "end": start_of_year + timedelta(days=30*(i+1) - 1)
-        }
-        for i in range(12)
-    ]
-
-    monthly_data = []
-    for month in months:
-        loans = await prisma.transaction.count(
-            where={
-                "issueDate": {
-                    "gte": month["start"],
-                    "lte": month["end"]
-                }
-            }
-        )
-        returns = await prisma.transaction.count(
-            where={
-                "returnDate": {
-                    "gte": month["start"],
-                    "lte": month["end"]
-                }
-            }
-        )
-        monthly_data.append(MonthlyData(
-            name=month["name"],
-            loans=loans,
-            returns=returns
-        ))
-
-    return monthly_data
-
-
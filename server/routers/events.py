@@ -0,0 +1,31 @@
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from events import broadcaster
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+# Comment lines keep idle connections open through proxies
+HEARTBEAT_SECONDS = 15
+
+@router.get("")
+async def stream_events():
+    """Server-Sent Events: `overview` and `monthly` (full state on connect,
+    changed keys afterwards) and `transaction` for every loan write."""
+    async def stream():
+        async with broadcaster.subscribe() as queue:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException
+from jobs.queue import job_queue
+from models import JobInfo
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+@router.get("/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str):
+    try:
+        job = await job_queue.get(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,29 +1,82 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional
 from services.member_service import MemberService
 from exceptions import LibraryException, ResourceNotFoundException, InvalidOperationException
 from models import Member, PaginatedResponse, MemberCreate
+from export import ExportFormat, export_response
+from pagination import TotalMode
+from conditional import conditional
 
 router = APIRouter(prefix="/api/members", tags=["members"])
 member_service = MemberService()
 
 @router.get("")
 async def get_members(
+    request: Request,
+    response: Response,
     search: Optional[str] = None,
     page: int = Query(default=1, ge=1),
-    limit: int = Query(default=20, ge=1)
+    limit: int = Query(default=20, ge=1),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None
 ):
     try:
-        return await member_service.get_members(search, page, limit)
+        return conditional(request, response, await member_service.get_members(search, page, limit, cursor, total, fields))
+    except LibraryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/export")
+async def export_members(format: ExportFormat = "csv", gzip: bool = False):
+    try:
+        return export_response(member_service.export_members(format, gzip), "members", format, gzip)
     except LibraryException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/{member_id}")
-async def get_member_by_id(member_id: int):
+async def get_member_by_id(request: Request, response: Response, member_id: int):
+    try:
+        return conditional(request, response, await member_service.get_member_by_id(member_id))
+    except ResourceNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LibraryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/{member_id}/transactions")
+async def get_member_transactions(
+    request: Request,
+    response: Response,
+    member_id: int,
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=20, ge=1),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None
+):
+    try:
+        return conditional(request, response, await member_service.get_member_transactions(member_id, page, limit, cursor, total))
+    except ResourceNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except LibraryException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/{member_id}/debt-entries")
+async def get_debt_entries(
+    member_id: int,
+    page: int = Query(default=1, ge=1),
+    limit: int = Query(default=20, ge=1),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None
+):
     try:
-        return await member_service.get_member_by_id(member_id)
+        return await member_service.get_debt_entries(member_id, page, limit, cursor, total)
     except ResourceNotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
     except LibraryException as e:
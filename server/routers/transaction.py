@@ -1,21 +1,35 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional, List
 from datetime import datetime, timedelta
-from models import Transaction, PaginatedResponse, TransactionCreate, TransactionReturn, MonthlyData
+from models import (
+    Transaction, PaginatedResponse, TransactionCreate, TransactionReturn, MonthlyData,
+    BatchIssueRequest, BatchReturnRequest, BatchResult
+)
+from export import ExportFormat, export_response
+from pagination import TotalMode
+from conditional import conditional
 from services.transaction_service import TransactionService
+from services.fee_service import FeeService
 from exceptions import ResourceNotFoundException, InvalidOperationException
 
 router = APIRouter(prefix="/api/transactions", tags=["transactions"])
 transaction_service = TransactionService()
+fee_service = FeeService()
 
 @router.get("")
 async def get_transactions(
+    request: Request,
+    response: Response,
     search: Optional[str] = None,
     page: int = Query(default=1, ge=1),
-    limit: int = Query(default=20, ge=1)
+    limit: int = Query(default=20, ge=1),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None
 ):
     try:
-        return await transaction_service.get_transactions(search, page, limit)
+        return conditional(request, response, await transaction_service.get_transactions(search, page, limit, cursor, total, fields, expand))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -30,6 +44,22 @@ async def create_transaction(transaction: TransactionCreate):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/batch-issue", response_model=BatchResult)
+async def batch_issue(request: BatchIssueRequest):
+    try:
+        return await transaction_service.batch_issue(request)
+    except ResourceNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/batch-return", response_model=BatchResult)
+async def batch_return(request: BatchReturnRequest):
+    try:
+        return await transaction_service.batch_return(request)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/{transaction_id}/return")
 async def return_book(
     transaction_id: int,
@@ -45,23 +75,50 @@ async def return_book(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/monthly-data")
-async def get_monthly_data():
+async def get_monthly_data(
+    year: Optional[int] = Query(default=None, ge=1900),
+    start_month: int = Query(default=1, ge=1, le=12),
+    end_month: int = Query(default=12, ge=1, le=12)
+):
     try:
-        return await transaction_service.get_monthly_data()
+        return await transaction_service.get_monthly_data(year, start_month, end_month)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export")
+async def export_transactions(format: ExportFormat = "csv", gzip: bool = False):
+    try:
+        return export_response(transaction_service.export_transactions(format, gzip), "transactions", format, gzip)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/recent")
-async def get_recent_transactions(limit: int = 5):
+async def get_recent_transactions(request: Request, response: Response, limit: int = 5,
+                                  fields: Optional[str] = None, expand: Optional[str] = None):
+    try:
+        return conditional(request, response, await transaction_service.get_recent_transactions(limit, fields, expand))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/fees")
+async def get_fee_summary():
+    try:
+        return await fee_service.get_fee_summary()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/fees/accrue")
+async def accrue_fees():
     try:
-        return await transaction_service.get_recent_transactions(limit)
+        return await fee_service.accrue_fees()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{transaction_id}")
-async def get_transaction_by_id(transaction_id: int):
+async def get_transaction_by_id(request: Request, response: Response, transaction_id: int,
+                                fields: Optional[str] = None, expand: Optional[str] = None):
     try:
-        return await transaction_service.get_transaction_by_id(transaction_id)
+        return conditional(request, response, await transaction_service.get_transaction_by_id(transaction_id, fields, expand))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
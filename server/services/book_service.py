@@ -1,98 +1,122 @@
-from datetime import datetime, timedelta
-from typing import Optional, List
-import httpx
-from database import prisma
-from exceptions import ResourceNotFoundException, InvalidOperationException
-from models import BookCreate, MonthlyData
+from typing import AsyncIterable, Optional, List
+from cache import Snapshot
+from config import OVERVIEW_TTL_SECONDS
+from database import prisma, read_client, reads_pinned, transaction_scope
+from exceptions import ResourceNotFoundException, ValidationException
+from models import BookCreate
+from entity_cache import book_cache
+from events import broadcaster
+from export import ExportFormat, stream_export
+from pagination import TotalMode, keyset_page, offset_page
+from projection import BOOK_FIELDS, Projection
+from services.frappe_client import frappe_client
+from jobs.queue import job_queue
+from services.enrichment_service import enrich_books
+from services.import_service import (
+    BookImportService, ConflictMode, ImportFormat, import_job, iter_spool, parse_rows, spool_upload
+)
+from services.ledger_search import restamp_book
+from services.search_service import book_search
+
+OVERVIEW_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM "Book") AS "totalBooks",
+        (SELECT COUNT(*) FROM "Member") AS "totalMembers",
+        (SELECT COUNT(*) FROM "Book"
+            WHERE "createdAt" >= (NOW() AT TIME ZONE 'UTC') - INTERVAL '30 days') AS "newBooks",
+        (SELECT COUNT(*) FROM "Member"
+            WHERE "createdAt" >= (NOW() AT TIME ZONE 'UTC') - INTERVAL '30 days') AS "newMembers",
+        (SELECT COALESCE(SUM("activeLoanCount"), 0) FROM "Member") AS "activeLoans",
+        (SELECT COUNT(*) FROM "Transaction" AS issue
+            WHERE issue."type" = 'ISSUE'
+            AND issue."issueDate" >= (NOW() AT TIME ZONE 'UTC') - INTERVAL '7 days'
+            AND NOT EXISTS (
+                SELECT 1 FROM "Transaction" AS ret WHERE ret."relatedTransactionId" = issue."id"
+            )) AS "lastWeekLoans"
+"""
 
 class BookService:
+    def __init__(self):
+        self._overview = Snapshot(self._compute_overview, OVERVIEW_TTL_SECONDS)
+        # Writes on any worker end the snapshot early on every worker
+        broadcaster.on("changed", lambda _: self._overview.invalidate())
+        broadcaster.on("reset", lambda _: self._overview.invalidate())
+
     async def get_overview(self):
-        now = datetime.now()
-        last_month = now - timedelta(days=30)
-        last_week = now - timedelta(days=7)
-
-        total_books = await prisma.book.count()
-        total_members = await prisma.member.count()
-        new_books = await prisma.book.count(
-            where={"createdAt": {"gte": last_month}}
-        )
-        new_members = await prisma.member.count(
-            where={"createdAt": {"gte": last_month}}
-        )
-        active_loans = await prisma.transaction.count(
-            where={"returnDate": None}
-        )
-        last_week_loans = await prisma.transaction.count(
-            where={
-                "issueDate": {"gte": last_week},
-                "returnDate": None
-            }
-        )
-        
+        if reads_pinned():
+            # The snapshot may predate this client's own write
+            return await self._compute_overview()
+        return await self._overview.get()
+
+    async def refresh_overview(self):
+        self._overview.invalidate()
+        return await self._overview.get()
+
+    async def _compute_overview(self):
+        row = (await read_client().query_raw(OVERVIEW_QUERY))[0]
+        active_loans = int(row["activeLoans"])
+        last_week_loans = int(row["lastWeekLoans"])
+
         loan_increase = (
             ((last_week_loans - active_loans) / active_loans * 100)
             if active_loans > 0 else 0
         )
 
         return {
-            "totalBooks": total_books,
-            "totalMembers": total_members,
-            "newBooks": new_books,
-            "newMembers": new_members,
+            "totalBooks": int(row["totalBooks"]),
+            "totalMembers": int(row["totalMembers"]),
+            "newBooks": int(row["newBooks"]),
+            "newMembers": int(row["newMembers"]),
             "activeLoans": active_loans,
             "loanIncrease": loan_increase,
         }
 
     async def search_frappe_books(self, title: Optional[str], authors: Optional[str],
                                 isbn: Optional[str], publisher: Optional[str], page: int):
-        async with httpx.AsyncClient() as client:
-            params = {k: v for k, v in locals().items() 
-                     if v is not None and k not in ["self", "client"]}
-            response = await client.get(
-                "https://frappe.io/api/method/frappe-library",
-                params=params
-            )
-            
-            if response.status_code != 200:
-                raise InvalidOperationException("Failed to fetch books from Frappe API")
-                
-            return response.json()["message"]
+        return await frappe_client.search(
+            title=title, authors=authors, isbn=isbn, publisher=publisher, page=page
+        )
+
+    async def get_books(self, search: Optional[str], page: int, limit: int,
+                        cursor: Optional[str] = None, total: Optional[TotalMode] = None,
+                        fields: Optional[str] = None):
+        projection = Projection(fields, None, BOOK_FIELDS)
 
-    async def get_books(self, search: Optional[str], page: int, limit: int):
-        where = {}
         if search:
-            where = {
-                "OR": [
-                    {"title": {"contains": search}},
-                    {"author": {"contains": search}},
-                    {"isbn": {"contains": search}}
-                ]
-            }
+            if cursor is not None:
+                raise ValidationException("Cursor pagination is not supported for ranked search")
+            return projection.apply_page(await self._search_books(search, page, limit))
 
-        total = await prisma.book.count(where=where)
-        books = await prisma.book.find_many(
-            where=where,
-            skip=(page - 1) * limit,
-            take=limit,
-            order={"createdAt": "desc"}
-        )
+        if cursor is not None:
+            return projection.apply_page(await keyset_page("book", {}, cursor, limit, total or "none"))
+        return projection.apply_page(await offset_page("book", {}, page, limit, total or "exact"))
+
+    async def _search_books(self, search: str, page: int, limit: int):
+        ids, total = await book_search.search(search, (page - 1) * limit, limit)
+        books = await read_client().book.find_many(where={"id": {"in": ids}}) if ids else []
+        by_id = {book.id: book for book in books}
 
         return {
-            "items": books,
+            "items": [by_id[book_id] for book_id in ids if book_id in by_id],
             "total": total,
             "page": page,
             "size": limit,
             "pages": (total + limit - 1) // limit
         }
 
-    async def get_book_by_id(self, book_id: int):
-        book = await prisma.book.find_unique(where={"id": book_id})
+    def export_books(self, fmt: ExportFormat, compress: bool):
+        return stream_export("book", BOOK_FIELDS, fmt, compress)
+
+    async def get_book_by_id(self, book_id: int, fields: Optional[str] = None):
+        book = await book_cache.get_or_load(
+            book_id, lambda: prisma.book.find_unique(where={"id": book_id})
+        )
         if not book:
             raise ResourceNotFoundException("Book not found")
-        return book
+        return Projection(fields, None, BOOK_FIELDS).apply(book)
 
     async def create_book(self, book: BookCreate):
-        return await prisma.book.create(
+        created_book = await prisma.book.create(
             data={
                 "title": book.title,
                 "author": book.author,
@@ -102,43 +126,65 @@ class BookService:
                 "imageUrl": book.imageUrl
             }
         )
+        book_search.add(created_book)
+        broadcaster.changed()
+        return created_book
 
-    async def import_multiple_books(self, books: List[BookCreate]):
-        imported = 0
-        total = len(books)
-        
-        for book in books:
-            try:
-                await self.create_book(book)
-                imported += 1
-            except Exception:
-                continue
-                
-        return {
-            "imported": imported,
-            "total": total
-        }
+    async def import_multiple_books(self, books: List[BookCreate], on_conflict: ConflictMode = "skip"):
+        return await BookImportService().import_books(books, on_conflict)
+
+    async def import_books_stream(self, chunks: AsyncIterable[bytes], fmt: ImportFormat,
+                                  on_conflict: ConflictMode = "skip"):
+        return await BookImportService().import_books(parse_rows(chunks, fmt), on_conflict)
+
+    async def queue_import(self, books: List[BookCreate], on_conflict: ConflictMode = "skip"):
+        return await job_queue.submit("import", import_job, books, on_conflict, total=len(books))
+
+    async def queue_import_stream(self, chunks: AsyncIterable[bytes], fmt: ImportFormat,
+                                  on_conflict: ConflictMode = "skip"):
+        spool = await spool_upload(chunks)
+        return await job_queue.submit("import", import_job, parse_rows(iter_spool(spool), fmt), on_conflict)
+
+    async def queue_enrichment(self):
+        return await job_queue.submit("enrich", enrich_books)
 
     async def update_book(self, book_id: int, book: BookCreate):
-        existing_book = await self.get_book_by_id(book_id)
-        if not existing_book:
-            raise ResourceNotFoundException("Book not found")
-            
-        return await prisma.book.update(
-            where={"id": book_id},
-            data={
-                "title": book.title,
-                "author": book.author,
-                "isbn": book.isbn,
-                "quantity": book.quantity,
-                "publisher": book.publisher,
-                "imageUrl": book.imageUrl
-            }
-        )
+        async with transaction_scope() as tx:
+            # Compare against the locked row, not a cached copy that another
+            # update may already have overtaken
+            existing = await tx.query_raw(
+                'SELECT "title", "onLoanCount" FROM "Book" WHERE "id" = $1 FOR NO KEY UPDATE', book_id
+            )
+            if not existing:
+                raise ResourceNotFoundException("Book not found")
+
+            updated_book = await tx.book.update(
+                where={"id": book_id},
+                data={
+                    "title": book.title,
+                    "author": book.author,
+                    "isbn": book.isbn,
+                    # Same reading of quantity as the importer's UPDATE_BOOKS
+                    "quantity": max(book.quantity - int(existing[0]["onLoanCount"]), 0),
+                    "publisher": book.publisher,
+                    "imageUrl": book.imageUrl
+                }
+            )
+            if updated_book.title != existing[0]["title"]:
+                await restamp_book(tx, book_id)
+
+        book_cache.invalidate(book_id)
+        book_search.add(updated_book)
+        broadcaster.changed()
+        return updated_book
 
     async def delete_book(self, book_id: int):
         existing_book = await self.get_book_by_id(book_id)
         if not existing_book:
             raise ResourceNotFoundException("Book not found")
             
-        return await prisma.book.delete(where={"id": book_id}) 
\ No newline at end of file
+        deleted_book = await prisma.book.delete(where={"id": book_id})
+        book_cache.invalidate(book_id)
+        book_search.remove(book_id)
+        broadcaster.changed()
+        return deleted_book 
\ No newline at end of file
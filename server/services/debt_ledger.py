@@ -0,0 +1,103 @@
+from typing import List
+
+# Every balance change below is a single statement: the Member row is
+# updated and its DebtEntry appended together, so concurrent payments,
+# charges and waivers cannot lose each other's updates.
+
+PAY_DEBT = """
+    WITH paid AS (
+        UPDATE "Member"
+        SET "outstandingDebt" = "outstandingDebt" - $2, "updatedAt" = NOW()
+        WHERE "id" = $1 AND "outstandingDebt" >= $2
+        RETURNING "id"
+    )
+    INSERT INTO "DebtEntry" ("memberId", "type", "amount", "createdAt")
+    SELECT "id", 'PAYMENT'::"DebtEntryType", -$2::float8, NOW() FROM paid
+"""
+
+CLEAR_DEBT = """
+    WITH locked AS (
+        SELECT "id", "outstandingDebt" AS "amount" FROM "Member" WHERE "id" = $1 FOR NO KEY UPDATE
+    ), cleared AS (
+        UPDATE "Member" AS m
+        SET "outstandingDebt" = 0, "updatedAt" = NOW()
+        FROM locked AS l
+        WHERE m."id" = l."id" AND l."amount" <> 0
+        RETURNING m."id", l."amount"
+    )
+    INSERT INTO "DebtEntry" ("memberId", "type", "amount", "createdAt")
+    SELECT "id", 'WAIVER'::"DebtEntryType", -"amount", NOW() FROM cleared
+"""
+
+RECORD_CHARGES = """
+    INSERT INTO "DebtEntry" ("memberId", "type", "amount", "transactionId", "createdAt")
+    SELECT item."memberId", 'CHARGE'::"DebtEntryType", item."amount", item."transactionId", NOW()
+    FROM unnest($1::int[], $2::float8[], $3::int[]) AS item("memberId", "amount", "transactionId")
+    WHERE item."amount" > 0
+"""
+
+# Undo whatever is still charged against a transaction, never taking the
+# balance below zero; the reversal is recorded against the same transaction
+REVERSE_CHARGES = """
+    WITH charged AS (
+        SELECT "memberId", SUM("amount") AS "amount"
+        FROM "DebtEntry"
+        WHERE "transactionId" = $1
+        GROUP BY "memberId"
+        HAVING SUM("amount") > 0
+    ), locked AS (
+        SELECT m."id", LEAST(m."outstandingDebt", c."amount") AS "amount"
+        FROM "Member" AS m
+        JOIN charged AS c ON c."memberId" = m."id"
+        FOR NO KEY UPDATE OF m
+    ), reversed AS (
+        UPDATE "Member" AS m
+        SET "outstandingDebt" = m."outstandingDebt" - l."amount", "updatedAt" = NOW()
+        FROM locked AS l
+        WHERE m."id" = l."id" AND l."amount" > 0
+        RETURNING m."id", l."amount"
+    )
+    INSERT INTO "DebtEntry" ("memberId", "type", "amount", "transactionId", "createdAt")
+    SELECT "id", 'ADJUSTMENT'::"DebtEntryType", -"amount", $1, NOW() FROM reversed
+"""
+
+LEDGER_BALANCES = """
+    SELECT m."id", ROUND(COALESCE(SUM(e."amount"), 0)::numeric, 2)::float8 AS "balance"
+    FROM "Member" AS m
+    LEFT JOIN "DebtEntry" AS e ON e."memberId" = m."id"
+    GROUP BY m."id"
+"""
+
+LOCK_MEMBERS = 'LOCK TABLE "Member" IN SHARE ROW EXCLUSIVE MODE'
+
+RECONCILE_BALANCES = f"""
+    UPDATE "Member" AS m
+    SET "outstandingDebt" = ledger."balance", "updatedAt" = NOW()
+    FROM ({LEDGER_BALANCES}) AS ledger
+    WHERE m."id" = ledger."id"
+    AND ROUND(m."outstandingDebt"::numeric, 2)::float8 IS DISTINCT FROM ledger."balance"
+"""
+
+async def pay_debt(client, member_id: int, amount: float) -> bool:
+    """Apply a payment; False when the member is missing or owes less than `amount`"""
+    return await client.execute_raw(PAY_DEBT, member_id, amount) > 0
+
+async def clear_debt(client, member_id: int):
+    await client.execute_raw(CLEAR_DEBT, member_id)
+
+async def record_charges(client, member_ids: List[int], amounts: List[float], transaction_ids: List[int]):
+    """Append CHARGE entries for balance increments the caller has already applied"""
+    if member_ids:
+        await client.execute_raw(RECORD_CHARGES, member_ids, amounts, transaction_ids)
+
+async def reverse_charges(client, transaction_id: int):
+    await client.execute_raw(REVERSE_CHARGES, transaction_id)
+
+async def reconcile_balances(client) -> int:
+    """Reset every Member.outstandingDebt to the sum of its ledger entries.
+
+    Must run inside a transaction: balance writes are held off until it
+    commits so none land between summing the ledger and updating members.
+    """
+    await client.execute_raw(LOCK_MEMBERS)
+    return await client.execute_raw(RECONCILE_BALANCES)
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Optional, Tuple
+
+import httpx
+
+from config import ENRICH_BATCH_SIZE, ENRICH_COVER_URL, ENRICH_COVER_TIMEOUT_SECONDS, FRAPPE_MAX_CONNECTIONS
+from database import prisma
+from entity_cache import book_cache
+from exceptions import InvalidOperationException
+from services.frappe_client import frappe_client
+
+MISSING_DETAILS = {"OR": [{"publisher": None}, {"imageUrl": None}]}
+
+async def _lookup(isbn: str) -> Optional[dict]:
+    try:
+        matches = await frappe_client.search(isbn=isbn, page=1)
+    except InvalidOperationException:
+        return None
+    for match in matches:
+        if isbn in (match.get("isbn"), match.get("isbn13")):
+            return match
+    return None
+
+async def _cover_url(client: httpx.AsyncClient, isbn: str) -> Optional[str]:
+    # Open Library answers unknown ISBNs with a blank placeholder image
+    # unless asked for a 404 instead
+    url = ENRICH_COVER_URL.format(isbn=isbn)
+    try:
+        response = await client.head(url, params={"default": "false"}, follow_redirects=True)
+    except httpx.HTTPError:
+        return None
+    return url if response.status_code < 400 else None
+
+async def _enrich(client: Optional[httpx.AsyncClient], book) -> Tuple[Optional[dict], Optional[str]]:
+    match = await _lookup(book.isbn)
+    if match is None or book.imageUrl or client is None:
+        return match, None
+    return match, await _cover_url(client, book.isbn)
+
+async def enrich_books(job) -> dict:
+    """Job body: fill missing publisher and cover image details from Frappe.
+
+    Books are walked in id order, ENRICH_BATCH_SIZE at a time. Each batch's
+    lookups run concurrently (bounded by the Frappe client's pool) and its
+    updates are written in one batch. Cover URLs are only written once the
+    image is confirmed to exist.
+    """
+    if not ENRICH_COVER_URL:
+        return await _enrich_batches(job, None)
+    async with httpx.AsyncClient(
+        timeout=ENRICH_COVER_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=FRAPPE_MAX_CONNECTIONS)
+    ) as client:
+        return await _enrich_batches(job, client)
+
+async def _enrich_batches(job, client: Optional[httpx.AsyncClient]) -> dict:
+    total = await prisma.book.count(where=MISSING_DETAILS)
+    last_id, checked, enriched, unmatched = 0, 0, 0, 0
+
+    while True:
+        books = await prisma.book.find_many(
+            where={"AND": [MISSING_DETAILS, {"id": {"gt": last_id}}]},
+            order={"id": "asc"},
+            take=ENRICH_BATCH_SIZE
+        )
+        if not books:
+            break
+
+        found = await asyncio.gather(*(_enrich(client, book) for book in books))
+        updates = []
+        for book, (match, cover_url) in zip(books, found):
+            if match is None:
+                unmatched += 1
+                continue
+
+            data = {}
+            if not book.publisher and match.get("publisher"):
+                data["publisher"] = match["publisher"]
+            if cover_url:
+                data["imageUrl"] = cover_url
+            if data:
+                updates.append((book.id, data))
+
+        if updates:
+            async with prisma.batch_() as batcher:
+                for book_id, data in updates:
+                    batcher.book.update(where={"id": book_id}, data=data)
+            book_cache.invalidate(*(book_id for book_id, _ in updates))
+            enriched += len(updates)
+
+        checked += len(books)
+        last_id = books[-1].id
+        await job.progress(checked, total)
+
+    return {"checked": checked, "enriched": enriched, "unmatched": unmatched}
@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from config import FEE_ACCRUAL_BATCH_SIZE
+from database import prisma
+from fees import epoch_seconds, fee_policy
+
+OPEN_LOANS_PAGE = """
+    SELECT issue."id", EXTRACT(EPOCH FROM issue."issueDate")::float8 AS "issuedAt", issue."accruedFee"
+    FROM "Transaction" AS issue
+    WHERE issue."type" = 'ISSUE' AND issue."id" > $1
+    AND NOT EXISTS (
+        SELECT 1 FROM "Transaction" AS ret WHERE ret."relatedTransactionId" = issue."id"
+    )
+    ORDER BY issue."id"
+    LIMIT $2
+"""
+
+UPDATE_ACCRUED_FEES = """
+    UPDATE "Transaction" AS t
+    SET "accruedFee" = item."fee", "updatedAt" = NOW()
+    FROM unnest($1::int[], $2::float8[]) AS item("id", "fee")
+    WHERE t."id" = item."id"
+"""
+
+FEE_SUMMARY_QUERY = """
+    SELECT COUNT(*) AS "openLoans",
+        COUNT(*) FILTER (WHERE issue."accruedFee" > 0) AS "accruingLoans",
+        COALESCE(SUM(issue."accruedFee"), 0) AS "totalAccrued"
+    FROM "Transaction" AS issue
+    WHERE issue."type" = 'ISSUE'
+    AND NOT EXISTS (
+        SELECT 1 FROM "Transaction" AS ret WHERE ret."relatedTransactionId" = issue."id"
+    )
+"""
+
+class FeeService:
+    async def accrue_fees(self, client=prisma, as_of: Optional[datetime] = None,
+                          batch_size: int = FEE_ACCRUAL_BATCH_SIZE):
+        """Recompute accruedFee for every open ISSUE transaction.
+
+        Each batch of open loans is evaluated with one array operation and
+        only the rows whose fee actually moved are written back, in a single
+        set-based UPDATE per batch.
+        """
+        as_of = as_of or datetime.now(timezone.utc)
+        now = epoch_seconds(as_of)
+        started = time.perf_counter()
+
+        last_id, evaluated, updated = 0, 0, 0
+        while True:
+            rows = await client.query_raw(OPEN_LOANS_PAGE, last_id, batch_size)
+            if not rows:
+                break
+
+            ids = np.fromiter((row["id"] for row in rows), dtype=np.int64, count=len(rows))
+            issued_at = np.fromiter((row["issuedAt"] for row in rows), dtype=np.float64, count=len(rows))
+            current = np.fromiter((row["accruedFee"] for row in rows), dtype=np.float64, count=len(rows))
+
+            fees = fee_policy.accrue(issued_at, now)
+            changed = fees != current
+            if changed.any():
+                updated += await client.execute_raw(
+                    UPDATE_ACCRUED_FEES, ids[changed].tolist(), fees[changed].tolist()
+                )
+
+            evaluated += len(rows)
+            last_id = int(ids[-1])
+            if len(rows) < batch_size:
+                break
+
+        return {
+            "asOf": as_of,
+            "evaluated": evaluated,
+            "updated": updated,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+
+    async def get_fee_summary(self):
+        row = (await prisma.query_raw(FEE_SUMMARY_QUERY))[0]
+        return {
+            "openLoans": int(row["openLoans"]),
+            "accruingLoans": int(row["accruingLoans"]),
+            "totalAccrued": float(row["totalAccrued"])
+        }
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from cache import TTLCache
+from config import (
+    FRAPPE_API_URL, FRAPPE_TIMEOUT_SECONDS, FRAPPE_CONNECT_TIMEOUT_SECONDS, FRAPPE_RETRIES,
+    FRAPPE_RETRY_BACKOFF_SECONDS, FRAPPE_MAX_CONNECTIONS, FRAPPE_CACHE_TTL_SECONDS, FRAPPE_CACHE_SIZE
+)
+from exceptions import InvalidOperationException
+
+logger = logging.getLogger(__name__)
+
+def normalize_params(params: Dict[str, object]) -> tuple:
+    normalized = []
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if not value:
+                continue
+        normalized.append((key, value))
+    return tuple(sorted(normalized))
+
+class FrappeClient:
+    """Pooled client for the Frappe library catalogue.
+
+    Responses are cached by normalized query params, and concurrent
+    identical searches share a single upstream request. `start` and `close`
+    tie the connection pool to the application lifetime; `transport`
+    replaces the network, e.g. with an httpx.MockTransport in tests.
+    """
+
+    def __init__(self, base_url: str = FRAPPE_API_URL, timeout: float = FRAPPE_TIMEOUT_SECONDS,
+                 retries: int = FRAPPE_RETRIES, cache_ttl: float = FRAPPE_CACHE_TTL_SECONDS,
+                 cache_size: int = FRAPPE_CACHE_SIZE,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache = TTLCache(cache_size, cache_ttl)
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=FRAPPE_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=FRAPPE_MAX_CONNECTIONS,
+                    max_keepalive_connections=FRAPPE_MAX_CONNECTIONS
+                ),
+                transport=self._transport
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._cache.clear()
+
+    async def search(self, **params):
+        key = normalize_params(params)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key: tuple):
+        await self.start()
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._client.get(self.base_url, params=dict(key))
+                if response.status_code < 500 or attempt == self.retries:
+                    break
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    logger.warning("Frappe request failed: %s", e)
+                    raise InvalidOperationException("Failed to fetch books from Frappe API")
+            await asyncio.sleep(FRAPPE_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+        if response.status_code != 200:
+            raise InvalidOperationException("Failed to fetch books from Frappe API")
+
+        books = response.json()["message"]
+        self._cache.set(key, books)
+        return books
+
+frappe_client = FrappeClient()
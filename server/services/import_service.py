@@ -0,0 +1,281 @@
+import codecs
+import csv
+import json
+import tempfile
+from typing import (
+    IO, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Literal, Optional, Tuple, Union
+)
+
+from prisma.errors import DataError, UniqueViolationError
+from pydantic import ValidationError
+
+from config import IMPORT_CHUNK_SIZE
+from database import prisma, transaction_scope
+from exceptions import ValidationException
+from entity_cache import book_cache
+from events import broadcaster
+from models import BookCreate, ImportReport, ImportRowResult
+from services.ledger_search import restamp_books
+from services.search_service import book_search
+
+ConflictMode = Literal["update", "skip"]
+ImportFormat = Literal["csv", "ndjson"]
+
+BOOK_FIELDS = ("title", "author", "isbn", "quantity", "publisher", "imageUrl")
+
+# An imported quantity is the number of copies owned, while Book.quantity
+# counts the copies on the shelf, so copies currently on loan are taken off
+# in the same statement that applies the import. Rows are locked in id order
+# first; their previous titles tell which books' ledger rows need restamping.
+UPDATE_BOOKS = """
+    WITH item AS (
+        SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::int[], $5::text[], $6::text[])
+            AS item("isbn", "title", "author", "quantity", "publisher", "imageUrl")
+    ), old AS (
+        SELECT b."id", b."isbn", b."title"
+        FROM "Book" AS b
+        JOIN item ON item."isbn" = b."isbn"
+        ORDER BY b."id"
+        FOR NO KEY UPDATE OF b
+    )
+    UPDATE "Book" AS b
+    SET "title" = item."title", "author" = item."author",
+        "quantity" = GREATEST(item."quantity" - b."onLoanCount", 0),
+        "publisher" = item."publisher", "imageUrl" = item."imageUrl", "updatedAt" = NOW()
+    FROM old, item
+    WHERE b."id" = old."id" AND item."isbn" = old."isbn"
+    RETURNING b."id", old."title" IS DISTINCT FROM item."title" AS "renamed"
+"""
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
+
+def _book_data(book: BookCreate) -> dict:
+    return {field: getattr(book, field) for field in BOOK_FIELDS}
+
+async def _iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    # Chunk boundaries can fall inside a multibyte character, so bytes are
+    # decoded incrementally and only complete characters reach the buffer
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    *lines, buffer = buffer.split("\n")
+    for line in lines:
+        yield line.rstrip("\r")
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+async def parse_rows(chunks: AsyncIterable[bytes], fmt: ImportFormat) -> AsyncIterator[Union[dict, Exception]]:
+    """Parse a streamed CSV (with header) or NDJSON upload one line at a time.
+
+    CSV records must not contain embedded newlines. Lines that cannot be
+    parsed are yielded as exceptions so they show up in the import report.
+    """
+    header: Optional[List[str]] = None
+    async for line in _iter_lines(chunks):
+        if not line.strip():
+            continue
+
+        if fmt == "ndjson":
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValidationException(f"Invalid JSON: {e}")
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield ValidationException(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield {name: (value if value != "" else None) for name, value in zip(header, values)}
+
+async def spool_upload(chunks: AsyncIterable[bytes]) -> IO[bytes]:
+    """Buffer a request body (spilling to disk past a few MB) so it can be
+    imported after the request has finished."""
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    async for chunk in chunks:
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+async def iter_spool(spool: IO[bytes], chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+async def import_job(job, rows: Union[Iterable, AsyncIterable], on_conflict: ConflictMode) -> dict:
+    """Job body for background imports; progress counts input rows."""
+    report = await BookImportService().import_books(rows, on_conflict, on_progress=job.progress)
+    return report.dict()
+
+class BookImportService:
+    """Chunked, upserting book importer keyed on the unique ISBN."""
+
+    def __init__(self, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    async def import_books(self, rows: Union[Iterable, AsyncIterable],
+                           on_conflict: ConflictMode = "skip",
+                           on_progress: Optional[Callable[[int], Awaitable]] = None) -> ImportReport:
+        results: List[ImportRowResult] = []
+        seen = set()
+        chunk: List[Tuple[int, BookCreate]] = []
+
+        async for index, row in self._enumerate(rows):
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                book = row if isinstance(row, BookCreate) else BookCreate(**row)
+            except ValidationError as e:
+                results.append(ImportRowResult(row=index, status="error", error=_describe(e)))
+                continue
+            except (ValidationException, TypeError) as e:
+                results.append(ImportRowResult(row=index, status="error", error=str(e)))
+                continue
+
+            if book.isbn in seen:
+                results.append(ImportRowResult(
+                    row=index, isbn=book.isbn, status="skipped", error="Duplicate ISBN in upload"
+                ))
+                continue
+            seen.add(book.isbn)
+
+            chunk.append((index, book))
+            if len(chunk) >= self.chunk_size:
+                results.extend(await self._write_chunk(chunk, on_conflict))
+                chunk = []
+                if on_progress is not None:
+                    await on_progress(index)
+
+        if chunk:
+            results.extend(await self._write_chunk(chunk, on_conflict))
+        if on_progress is not None:
+            await on_progress(len(results))
+
+        results.sort(key=lambda result: result.row)
+        counts = {status: 0 for status in ("created", "updated", "skipped", "error")}
+        for result in results:
+            counts[result.status] += 1
+
+        return ImportReport(
+            total=len(results),
+            imported=counts["created"] + counts["updated"],
+            created=counts["created"],
+            updated=counts["updated"],
+            skipped=counts["skipped"],
+            errors=counts["error"],
+            results=results
+        )
+
+    @staticmethod
+    async def _enumerate(rows):
+        index = 0
+        if hasattr(rows, "__aiter__"):
+            async for row in rows:
+                index += 1
+                yield index, row
+        else:
+            for row in rows:
+                index += 1
+                yield index, row
+
+    async def _write_chunk(self, chunk: List[Tuple[int, BookCreate]],
+                           on_conflict: ConflictMode) -> List[ImportRowResult]:
+        existing = {
+            book.isbn: book.id for book in await prisma.book.find_many(
+                where={"isbn": {"in": [book.isbn for _, book in chunk]}}
+            )
+        }
+        new_rows = [(index, book) for index, book in chunk if book.isbn not in existing]
+        old_rows = [(index, book) for index, book in chunk if book.isbn in existing]
+
+        results = await self._create_rows(new_rows, on_conflict)
+
+        if on_conflict == "skip":
+            results.extend(
+                ImportRowResult(row=index, isbn=book.isbn, status="skipped", error="ISBN already exists")
+                for index, book in old_rows
+            )
+        else:
+            results.extend(await self._update_rows(old_rows))
+            book_cache.invalidate(*(existing[book.isbn] for _, book in old_rows))
+
+        await book_search.add_isbns([book.isbn for _, book in chunk])
+        broadcaster.changed()
+        return results
+
+    async def _create_rows(self, rows: List[Tuple[int, BookCreate]],
+                           on_conflict: ConflictMode) -> List[ImportRowResult]:
+        if not rows:
+            return []
+
+        try:
+            await prisma.book.create_many(data=[_book_data(book) for _, book in rows])
+            return [ImportRowResult(row=index, isbn=book.isbn, status="created") for index, book in rows]
+        except DataError:
+            # A concurrent writer or a bad row failed the whole batch; retry
+            # row by row so every row gets its own outcome. Anything else,
+            # such as a lost connection, fails the import.
+            pass
+
+        results = []
+        for index, book in rows:
+            try:
+                await prisma.book.create(data=_book_data(book))
+                results.append(ImportRowResult(row=index, isbn=book.isbn, status="created"))
+            except UniqueViolationError:
+                # Inserted by someone else since the chunk was looked up
+                if on_conflict == "skip":
+                    results.append(ImportRowResult(
+                        row=index, isbn=book.isbn, status="skipped", error="ISBN already exists"
+                    ))
+                else:
+                    results.extend(await self._update_rows([(index, book)]))
+            except DataError as e:
+                results.append(ImportRowResult(row=index, isbn=book.isbn, status="error", error=str(e)))
+        return results
+
+    async def _update_rows(self, rows: List[Tuple[int, BookCreate]]) -> List[ImportRowResult]:
+        if not rows:
+            return []
+
+        try:
+            await self._apply_updates([book for _, book in rows])
+            return [ImportRowResult(row=index, isbn=book.isbn, status="updated") for index, book in rows]
+        except DataError:
+            pass
+
+        results = []
+        for index, book in rows:
+            try:
+                await self._apply_updates([book])
+                results.append(ImportRowResult(row=index, isbn=book.isbn, status="updated"))
+            except DataError as e:
+                results.append(ImportRowResult(row=index, isbn=book.isbn, status="error", error=str(e)))
+        return results
+
+    @staticmethod
+    async def _apply_updates(books: List[BookCreate]):
+        columns = {field: [getattr(book, field) for book in books] for field in BOOK_FIELDS}
+        async with transaction_scope() as tx:
+            rows = await tx.query_raw(
+                UPDATE_BOOKS, columns["isbn"], columns["title"], columns["author"],
+                columns["quantity"], columns["publisher"], columns["imageUrl"]
+            )
+            await restamp_books(tx, [row["id"] for row in rows if row["renamed"]])
@@ -0,0 +1,53 @@
+from typing import List, Tuple
+
+from database import read_client
+from services.search_service import escape_like
+
+# Lower-cased book title, member name and member email, kept on every
+# Transaction row so ledger search scans one trigram index instead of
+# joining Book and Member.
+SEARCH_TEXT = """lower(b."title" || ' ' || m."name" || ' ' || m."email")"""
+
+_STAMP = f"""
+    UPDATE "Transaction" AS t
+    SET "searchText" = {SEARCH_TEXT}
+    FROM "Book" AS b, "Member" AS m
+    WHERE t."bookId" = b."id" AND t."memberId" = m."id" AND {{condition}}
+"""
+
+STAMP_BY_IDS = _STAMP.format(condition='t."id" = ANY($1::int[])')
+STAMP_BY_BOOK = _STAMP.format(condition='t."bookId" = $1')
+STAMP_BY_BOOKS = _STAMP.format(condition='t."bookId" = ANY($1::int[])')
+STAMP_BY_MEMBER = _STAMP.format(condition='t."memberId" = $1')
+
+LEDGER_SEARCH_QUERY = """
+    SELECT "id",
+        word_similarity($1, "searchText") AS "rank",
+        COUNT(*) OVER () AS "total"
+    FROM "Transaction"
+    WHERE "searchText" LIKE $2
+    ORDER BY "rank" DESC, "createdAt" DESC, "id" DESC
+    LIMIT $3 OFFSET $4
+"""
+
+async def stamp_transactions(client, transaction_ids: List[int]):
+    if transaction_ids:
+        await client.execute_raw(STAMP_BY_IDS, transaction_ids)
+
+async def restamp_book(client, book_id: int):
+    await client.execute_raw(STAMP_BY_BOOK, book_id)
+
+async def restamp_books(client, book_ids: List[int]):
+    if book_ids:
+        await client.execute_raw(STAMP_BY_BOOKS, book_ids)
+
+async def restamp_member(client, member_id: int):
+    await client.execute_raw(STAMP_BY_MEMBER, member_id)
+
+async def search_ledger(query: str, offset: int, limit: int) -> Tuple[List[int], int]:
+    needle = query.lower()
+    rows = await read_client().query_raw(
+        LEDGER_SEARCH_QUERY, needle, f"%{escape_like(needle)}%", limit, offset
+    )
+    total = int(rows[0]["total"]) if rows else 0
+    return [row["id"] for row in rows], total
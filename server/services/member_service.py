@@ -1,126 +1,179 @@
-from typing import Optional
-from database import prisma
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from config import LOAN_PERIOD_DAYS
+from database import prisma, read_client, transaction_scope
 from exceptions import ResourceNotFoundException, InvalidOperationException
-from models import MemberCreate
+from models import MemberCreate, MemberWithSummary
+from entity_cache import member_cache
+from events import broadcaster
+from export import ExportFormat, stream_export
+from pagination import TotalMode, keyset_page, offset_page
+from projection import MEMBER_FIELDS, MEMBER_SUMMARY_FIELDS, Projection
+from services import debt_ledger
+from services.ledger_search import restamp_member
+
+LOAN_SUMMARY_QUERY = """
+    SELECT t."memberId",
+        COUNT(*) FILTER (WHERE t."type" = 'ISSUE') AS "totalLoans",
+        MAX(t."createdAt") AS "lastActivity",
+        COUNT(*) FILTER (
+            WHERE t."type" = 'ISSUE' AND ret."id" IS NULL AND t."issueDate" < $2::timestamp
+        ) AS "overdueCount"
+    FROM "Transaction" AS t
+    LEFT JOIN "Transaction" AS ret ON ret."relatedTransactionId" = t."id"
+    WHERE t."memberId" = ANY($1::int[])
+    GROUP BY t."memberId"
+"""
+
+async def _with_summaries(members: List) -> List[MemberWithSummary]:
+    """Attach loan summaries to a page of members using one grouped query."""
+    if not members:
+        return []
+
+    due_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=LOAN_PERIOD_DAYS)
+    rows = await read_client().query_raw(
+        LOAN_SUMMARY_QUERY, [member.id for member in members], due_before.isoformat()
+    )
+    by_member = {row["memberId"]: row for row in rows}
+
+    summaries = []
+    for member in members:
+        row = by_member.get(member.id, {})
+        summaries.append(MemberWithSummary(
+            **{field: getattr(member, field) for field in MEMBER_FIELDS},
+            totalLoans=int(row.get("totalLoans") or 0),
+            lastActivity=row.get("lastActivity"),
+            overdueCount=int(row.get("overdueCount") or 0)
+        ))
+    return summaries
 
 class MemberService:
-    async def get_members(self, search: Optional[str], page: int, limit: int):
+    async def get_members(self, search: Optional[str], page: int, limit: int,
+                          cursor: Optional[str] = None, total: Optional[TotalMode] = None,
+                          fields: Optional[str] = None):
+        projection = Projection(fields, None, MEMBER_SUMMARY_FIELDS)
+
         where = {}
         if search:
             where = {
                 "OR": [
                     {"name": {"contains": search}},
-                    {"email": {"contains": search}},
-                    {"phone": {"contains": search}}
+                    {"email": {"contains": search}}
                 ]
             }
 
-        total = await prisma.member.count(where=where)
-        members = await prisma.member.find_many(
-            where=where,
-            skip=(page - 1) * limit,
-            take=limit,
-            order={"createdAt": "desc"},
-            include={
-                "transactions": {
-                    "where": {
-                        "returnDate": None
-                    }
-                }
-            }
-        )
+        if cursor is not None:
+            page_data = await keyset_page("member", where, cursor, limit, total or "none")
+        else:
+            page_data = await offset_page("member", where, page, limit, total or "exact")
 
-        return {
-            "items": members,
-            "total": total,
-            "page": page,
-            "size": limit,
-            "pages": (total + limit - 1) // limit
-        }
+        page_data["items"] = await _with_summaries(page_data["items"])
+        return projection.apply_page(page_data)
+
+    def export_members(self, fmt: ExportFormat, compress: bool):
+        return stream_export("member", MEMBER_FIELDS, fmt, compress)
 
     async def get_member_by_id(self, member_id: int):
-        member = await prisma.member.find_unique(
-            where={"id": member_id},
-            include={"transactions": True}
+        member = await self._get_member(member_id)
+        return (await _with_summaries([member]))[0]
+
+    async def _get_member(self, member_id: int):
+        member = await member_cache.get_or_load(
+            member_id, lambda: prisma.member.find_unique(where={"id": member_id})
         )
         if not member:
             raise ResourceNotFoundException("Member not found")
         return member
 
+    async def get_member_transactions(self, member_id: int, page: int, limit: int,
+                                      cursor: Optional[str] = None, total: Optional[TotalMode] = None):
+        await self._get_member(member_id)
+
+        where = {"memberId": member_id}
+        include = {"book": True, "relatedTo": True}
+        if cursor is not None:
+            return await keyset_page("transaction", where, cursor, limit, total or "none", include=include)
+        return await offset_page("transaction", where, page, limit, total or "exact", include=include)
+
     async def create_member(self, member: MemberCreate):
-        return await prisma.member.create(
+        created_member = await prisma.member.create(
             data={
                 "name": member.name,
                 "email": member.email,
-                "phone": member.phone,
                 "address": member.address,
-                "status": member.status,
-                "imageUrl": member.imageUrl,
                 "outstandingDebt": 0
-            },
-            include={"transactions": True}
+            }
         )
+        broadcaster.changed()
+        return created_member
 
     async def update_member(self, member_id: int, member: MemberCreate):
-        existing_member = await self.get_member_by_id(member_id)
-        if not existing_member:
-            raise ResourceNotFoundException("Member not found")
+        async with transaction_scope() as tx:
+            # Compare against the locked row, not a cached copy that another
+            # update may already have overtaken
+            existing = await tx.query_raw(
+                'SELECT "name", "email" FROM "Member" WHERE "id" = $1 FOR NO KEY UPDATE', member_id
+            )
+            if not existing:
+                raise ResourceNotFoundException("Member not found")
 
-        return await prisma.member.update(
-            where={"id": member_id},
-            data={
-                "name": member.name,
-                "email": member.email,
-                "phone": member.phone,
-                "address": member.address,
-                "status": member.status,
-                "imageUrl": member.imageUrl
-            },
-            include={"transactions": True}
-        )
+            updated_member = await tx.member.update(
+                where={"id": member_id},
+                data={
+                    "name": member.name,
+                    "email": member.email,
+                    "address": member.address
+                }
+            )
+            if (updated_member.name, updated_member.email) != (existing[0]["name"], existing[0]["email"]):
+                await restamp_member(tx, member_id)
+
+        member_cache.invalidate(member_id)
+        return updated_member
 
     async def delete_member(self, member_id: int):
-        member = await prisma.member.find_unique(
-            where={"id": member_id},
-            include={
-                "transactions": {
-                    "where": {
-                        "returnDate": None
-                    }
-                }
-            }
-        )
+        member = await prisma.member.find_unique(where={"id": member_id})
         
         if not member:
             raise ResourceNotFoundException("Member not found")
         
-        if member.transactions or member.outstandingDebt > 0:
+        if member.activeLoanCount > 0 or member.outstandingDebt > 0:
             raise InvalidOperationException(
                 "Cannot delete member with active loans or outstanding debt"
             )
             
-        return await prisma.member.delete(
-            where={"id": member_id},
-            include={"transactions": True}
-        )
+        deleted_member = await prisma.member.delete(where={"id": member_id})
+        member_cache.invalidate(member_id)
+        broadcaster.changed()
+        return deleted_member
+
+    async def get_debt_entries(self, member_id: int, page: int, limit: int,
+                               cursor: Optional[str] = None, total: Optional[TotalMode] = None):
+        await self._get_member(member_id)
+
+        where = {"memberId": member_id}
+        if cursor is not None:
+            return await keyset_page("debtentry", where, cursor, limit, total or "none")
+        return await offset_page("debtentry", where, page, limit, total or "exact")
 
     async def pay_debt(self, member_id: int, amount: float):
-        member = await self.get_member_by_id(member_id)
-        
-        if amount > member.outstandingDebt:
+        # The balance check is part of the UPDATE, so two payments racing
+        # each other can never take the debt below zero.
+        paid = await debt_ledger.pay_debt(prisma, member_id, amount)
+        member_cache.invalidate(member_id)
+
+        updated_member = await prisma.member.find_unique(where={"id": member_id})
+        if not updated_member:
+            raise ResourceNotFoundException("Member not found")
+        if not paid:
             raise InvalidOperationException("Payment amount cannot exceed outstanding debt")
-            
-        return await prisma.member.update(
-            where={"id": member_id},
-            data={"outstandingDebt": member.outstandingDebt - amount},
-            include={"transactions": True}
-        )
+        return updated_member
 
     async def clear_debt(self, member_id: int):
-        member = await self.get_member_by_id(member_id)
-        
-        return await prisma.member.update(
-            where={"id": member_id},
-            data={"outstandingDebt": 0},
-            include={"transactions": True}
-        ) 
\ No newline at end of file
+        await debt_ledger.clear_debt(prisma, member_id)
+        member_cache.invalidate(member_id)
+
+        updated_member = await prisma.member.find_unique(where={"id": member_id})
+        if not updated_member:
+            raise ResourceNotFoundException("Member not found")
+        return updated_member 
\ No newline at end of file
@@ -0,0 +1,184 @@
+import asyncio
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import List, Tuple
+
+from config import SEARCH_BACKEND
+from database import prisma, read_client
+from events import broadcaster
+
+SEARCH_QUERY = """
+    SELECT "id",
+        GREATEST(
+            similarity("title", $1),
+            similarity("author", $1),
+            CASE WHEN "isbn" LIKE $2 THEN 1 ELSE 0 END
+        ) AS "rank",
+        COUNT(*) OVER () AS "total"
+    FROM "Book"
+    WHERE "title" ILIKE $3 OR "author" ILIKE $3 OR "isbn" LIKE $2
+    ORDER BY "rank" DESC, "createdAt" DESC, "id" DESC
+    LIMIT $4 OFFSET $5
+"""
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _similarity(query: set, text: str) -> float:
+    grams = _trigrams(text)
+    union = len(query | grams)
+    return len(query & grams) / union if union else 0.0
+
+class PostgresBookSearch:
+    """Ranked book search backed by the pg_trgm GIN indexes on Book."""
+
+    async def search(self, query: str, offset: int, limit: int) -> Tuple[List[int], int]:
+        escaped = escape_like(query)
+        rows = await read_client().query_raw(
+            SEARCH_QUERY, query, f"{escaped}%", f"%{escaped}%", limit, offset
+        )
+        total = int(rows[0]["total"]) if rows else 0
+        return [row["id"] for row in rows], total
+
+    async def warm(self):
+        pass
+
+    def add(self, book):
+        pass
+
+    def remove(self, book_id: int):
+        pass
+
+    async def add_isbns(self, isbns: List[str]):
+        pass
+
+class InMemoryBookSearch:
+    """In-process trigram inverted index over title/author plus an ISBN prefix list.
+
+    The index is loaded lazily on the first search and kept current through
+    add/remove. Every worker holds its own copy; the ids each one changes
+    are sent to the others, which reload those books from the database.
+    """
+
+    def __init__(self):
+        self._docs = {}
+        self._postings = defaultdict(set)
+        self._isbns = []
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        broadcaster.on("search", lambda data: asyncio.ensure_future(self._reload(data["ids"])))
+        broadcaster.on("reset", lambda _: self._clear())
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            for book in await prisma.book.find_many():
+                self._index(book)
+            self._loaded = True
+
+    async def warm(self):
+        await self._ensure_loaded()
+
+    def add(self, book):
+        self._index(book)
+        broadcaster.send("search", {"ids": [book.id]})
+
+    def remove(self, book_id: int):
+        self._unindex(book_id)
+        broadcaster.send("search", {"ids": [book_id]})
+
+    def _clear(self):
+        # Reloaded from scratch by the next search
+        self._docs.clear()
+        self._postings.clear()
+        self._isbns.clear()
+        self._loaded = False
+
+    async def _reload(self, book_ids: List[int]):
+        if not self._loaded:
+            return
+        books = await prisma.book.find_many(where={"id": {"in": book_ids}})
+        for book in books:
+            self._index(book)
+        for book_id in set(book_ids) - {book.id for book in books}:
+            self._unindex(book_id)
+
+    def _index(self, book):
+        self._unindex(book.id)
+
+        title, author = book.title.lower(), book.author.lower()
+        self._docs[book.id] = (title, author, book.isbn, book.createdAt)
+        for gram in _trigrams(title) | _trigrams(author):
+            self._postings[gram].add(book.id)
+        insort(self._isbns, (book.isbn, book.id))
+
+    def _unindex(self, book_id: int):
+        doc = self._docs.pop(book_id, None)
+        if doc is None:
+            return
+
+        title, author, isbn, _ = doc
+        for gram in _trigrams(title) | _trigrams(author):
+            self._postings[gram].discard(book_id)
+            if not self._postings[gram]:
+                del self._postings[gram]
+
+        index = bisect_left(self._isbns, (isbn, book_id))
+        if index < len(self._isbns) and self._isbns[index] == (isbn, book_id):
+            del self._isbns[index]
+
+    async def add_isbns(self, isbns: List[str]):
+        if not isbns:
+            return
+        # Other workers may have loaded their index even if this one has not
+        books = await prisma.book.find_many(where={"isbn": {"in": isbns}})
+        if self._loaded:
+            for book in books:
+                self._index(book)
+        if books:
+            broadcaster.send("search", {"ids": [book.id for book in books]})
+
+    def _isbn_prefix_matches(self, prefix: str) -> set:
+        matches = set()
+        index = bisect_left(self._isbns, (prefix,))
+        while index < len(self._isbns) and self._isbns[index][0].startswith(prefix):
+            matches.add(self._isbns[index][1])
+            index += 1
+        return matches
+
+    async def search(self, query: str, offset: int, limit: int) -> Tuple[List[int], int]:
+        await self._ensure_loaded()
+
+        needle = query.lower()
+        if len(needle) >= 3:
+            grams = [needle[i:i + 3] for i in range(len(needle) - 2)]
+            candidates = set.intersection(*(self._postings.get(gram, set()) for gram in grams))
+        else:
+            candidates = set(self._docs)
+
+        text_matches = {
+            book_id for book_id in candidates
+            if needle in self._docs[book_id][0] or needle in self._docs[book_id][1]
+        }
+        isbn_matches = self._isbn_prefix_matches(query)
+
+        query_grams = _trigrams(needle)
+
+        def rank(book_id: int):
+            title, author, _, created_at = self._docs[book_id]
+            score = 1.0 if book_id in isbn_matches else max(
+                _similarity(query_grams, title), _similarity(query_grams, author)
+            )
+            return (score, created_at, book_id)
+
+        ranked = sorted(text_matches | isbn_matches, key=rank, reverse=True)
+        return ranked[offset:offset + limit], len(ranked)
+
+book_search = InMemoryBookSearch() if SEARCH_BACKEND == "memory" else PostgresBookSearch()
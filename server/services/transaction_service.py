@@ -1,29 +1,161 @@
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
-from database import prisma
-from exceptions import ResourceNotFoundException, InvalidOperationException
-from models import TransactionCreate, TransactionReturn, MonthlyData
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Tuple
+from prisma.errors import UniqueViolationError
+from config import MAX_ACTIVE_LOANS
+from database import prisma, read_client, transaction_scope
+from exceptions import ResourceNotFoundException, InvalidOperationException, ValidationException
+from models import (
+    TransactionCreate, TransactionReturn, MonthlyData,
+    BatchIssueRequest, BatchReturnRequest, BatchItemResult, BatchResult
+)
+from entity_cache import book_cache, member_cache
+from events import broadcaster
+from fees import fee_policy
+from export import ExportFormat, stream_export
+from pagination import TotalMode, keyset_page, offset_page
+from projection import TRANSACTION_FIELDS, TRANSACTION_RELATIONS, Projection
+from services.debt_ledger import record_charges, reverse_charges
+from services.ledger_search import search_ledger, stamp_transactions
+
+def _month_start(date: datetime) -> datetime:
+    # Months are UTC months, as in the backfill's date_trunc over the stored
+    # UTC timestamps; an offset near midnight can change the month
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return datetime(date.year, date.month, 1)
+
+def _next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return datetime(month.year + 1, 1, 1)
+    return datetime(month.year, month.month + 1, 1)
+
+FULL_INCLUDE = {
+    "book": True,
+    "member": True,
+    "relatedTransaction": True,
+    "relatedTo": True
+}
+
+BATCH_INSERT_ISSUES = """
+    INSERT INTO "Transaction" ("type", "bookId", "memberId", "issueDate", "createdAt", "updatedAt")
+    SELECT 'ISSUE'::"TransactionType", item."bookId", $2, $3::timestamp, NOW(), NOW()
+    FROM unnest($1::int[]) WITH ORDINALITY AS item("bookId", "position")
+    ORDER BY item."position"
+    RETURNING "id"
+"""
+
+BATCH_INSERT_RETURNS = """
+    INSERT INTO "Transaction" (
+        "type", "bookId", "memberId", "issueDate", "returnDate", "rentFee",
+        "relatedTransactionId", "createdAt", "updatedAt"
+    )
+    SELECT 'RETURN'::"TransactionType", issue."bookId", issue."memberId", issue."issueDate",
+        $3::timestamp, item."fee", issue."id", NOW(), NOW()
+    FROM unnest($1::int[], $2::float8[]) AS item("issueId", "fee")
+    JOIN "Transaction" AS issue ON issue."id" = item."issueId"
+    ON CONFLICT ("relatedTransactionId") DO NOTHING
+    RETURNING "id", "relatedTransactionId"
+"""
+
+# Every write path takes its row locks in the same order: Member rows, then
+# Book rows (each set by ascending id), then existing Transaction rows, then
+# MonthlyStat. Concurrent checkouts, returns, deletes and renames therefore
+# queue behind each other instead of deadlocking. Explicit locks are FOR NO
+# KEY UPDATE, the mode a plain UPDATE takes, so they never conflict with the
+# FOR KEY SHARE locks that inserting a Transaction puts on its member and book.
+LOCK_MEMBERS = """
+    SELECT "id", "activeLoanCount" FROM "Member" WHERE "id" = ANY($1::int[]) ORDER BY "id" FOR NO KEY UPDATE
+"""
+LOCK_BOOKS = """
+    SELECT "id", "quantity" FROM "Book" WHERE "id" = ANY($1::int[]) ORDER BY "id" FOR NO KEY UPDATE
+"""
+
+BATCH_UPDATE_BOOKS = """
+    UPDATE "Book" AS b
+    SET "quantity" = b."quantity" - item."delta",
+        "onLoanCount" = b."onLoanCount" + item."delta",
+        "updatedAt" = NOW()
+    FROM unnest($1::int[], $2::int[]) AS item("id", "delta")
+    WHERE b."id" = item."id"
+"""
+
+BATCH_UPDATE_MEMBERS = """
+    UPDATE "Member" AS m
+    SET "activeLoanCount" = m."activeLoanCount" + item."loans",
+        "outstandingDebt" = m."outstandingDebt" + item."debt",
+        "updatedAt" = NOW()
+    FROM unnest($1::int[], $2::int[], $3::float8[]) AS item("id", "loans", "debt")
+    WHERE m."id" = item."id"
+"""
+
+def _utc_naive(date: datetime) -> str:
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date.isoformat()
+
+def _tally(pairs) -> Tuple[list, list]:
+    totals: Dict[int, Any] = {}
+    for key, amount in pairs:
+        totals[key] = totals.get(key, 0) + amount
+    return list(totals.keys()), list(totals.values())
+
+# Shape of the transactions carried by live `transaction` events
+LIVE_PROJECTION = Projection(None, "book,member", TRANSACTION_FIELDS, TRANSACTION_RELATIONS)
+
+# Transactions per live event, keeping each well inside the NOTIFY limit
+ANNOUNCE_BATCH_SIZE = 5
+
+def _announce(action: str, transactions: list):
+    for start in range(0, len(transactions), ANNOUNCE_BATCH_SIZE):
+        broadcaster.publish("transaction", {
+            "action": action, "transactions": transactions[start:start + ANNOUNCE_BATCH_SIZE]
+        })
+    broadcaster.changed()
+
+async def _announce_ids(action: str, transaction_ids: List[int]):
+    # Batch writes insert with raw SQL; load the rows so their events carry
+    # the same book and member summaries as single writes
+    transactions = await prisma.transaction.find_many(
+        where={"id": {"in": transaction_ids}},
+        include=LIVE_PROJECTION.include(),
+        order={"id": "asc"}
+    )
+    _announce(action, [LIVE_PROJECTION.apply(transaction) for transaction in transactions])
+
+async def _bump_monthly_stat(client, date: datetime, field: str, amount: int):
+    month = _month_start(date)
+    await client.monthlystat.upsert(
+        where={"month": month},
+        data={
+            "create": {"month": month, field: max(amount, 0)},
+            "update": {field: {"increment": amount}}
+        }
+    )
 
 class TransactionService:
     async def create_transaction(self, transaction: TransactionCreate):
-        book = await prisma.book.find_unique(where={"id": transaction.bookId})
-        if not book:
-            raise ResourceNotFoundException("Book not found")
-        if book.quantity <= 0:
-            raise InvalidOperationException("Book is out of stock")
-
-        active_loans = await prisma.transaction.count(
-            where={
-                "memberId": transaction.memberId,
-                "type": "ISSUE",
-                "relatedTo": None
-            }
-        )
-        if active_loans >= 5:
-            raise InvalidOperationException("Member has reached maximum number of active loans")
+        async with transaction_scope() as tx:
+            # Both counters are guarded in the WHERE clause, so the loan limit
+            # and the stock check hold even under concurrent checkouts.
+            admitted = await tx.member.update_many(
+                where={"id": transaction.memberId, "activeLoanCount": {"lt": MAX_ACTIVE_LOANS}},
+                data={"activeLoanCount": {"increment": 1}}
+            )
+            if not admitted:
+                if not await tx.member.find_unique(where={"id": transaction.memberId}):
+                    raise ResourceNotFoundException("Member not found")
+                raise InvalidOperationException("Member has reached maximum number of active loans")
+
+            reserved = await tx.book.update_many(
+                where={"id": transaction.bookId, "quantity": {"gt": 0}},
+                data={"quantity": {"decrement": 1}, "onLoanCount": {"increment": 1}}
+            )
+            if not reserved:
+                if not await tx.book.find_unique(where={"id": transaction.bookId}):
+                    raise ResourceNotFoundException("Book not found")
+                raise InvalidOperationException("Book is out of stock")
 
-        async with prisma.tx() as tx:
-            created_transaction = await prisma.transaction.create(
+            created_transaction = await tx.transaction.create(
                 data={
                     "type": "ISSUE",
                     "bookId": transaction.bookId,
@@ -36,181 +168,324 @@ class TransactionService:
                     "relatedTo": True
                 }
             )
-            
-            await prisma.book.update(
-                where={"id": transaction.bookId},
-                data={"quantity": book.quantity - 1}
-            )
 
+            await stamp_transactions(tx, [created_transaction.id])
+            await _bump_monthly_stat(tx, transaction.issueDate, "loans", 1)
+
+        book_cache.invalidate(transaction.bookId)
+        member_cache.invalidate(transaction.memberId)
+        _announce("issue", [LIVE_PROJECTION.apply(created_transaction)])
         return created_transaction
 
     async def return_book(self, transaction_id: int, return_data: TransactionReturn):
-        issue_transaction = await prisma.transaction.find_unique(
-            where={"id": transaction_id},
-            include={
-                "book": True,
-                "member": True,
-                "relatedTo": True
-            }
-        )
-        
-        if not issue_transaction:
-            raise ResourceNotFoundException("Transaction not found")
-        if issue_transaction.type != "ISSUE":
-            raise InvalidOperationException("Can only return books from ISSUE transactions")
-        if issue_transaction.relatedTo:
-            raise InvalidOperationException("Book already returned")
-
-        async with prisma.tx() as tx:
-            return_transaction = await prisma.transaction.create(
-                data={
-                    "type": "RETURN",
-                    "bookId": issue_transaction.bookId,
-                    "memberId": issue_transaction.memberId,
-                    "issueDate": issue_transaction.issueDate,
-                    "returnDate": return_data.return_date,
-                    "rentFee": return_data.rent_fee,
-                    "relatedTransactionId": transaction_id
-                },
-                include={
-                    "book": True,
-                    "member": True,
-                    "relatedTransaction": True
-                }
+        async with transaction_scope() as tx:
+            issue_transaction = await tx.transaction.find_unique(
+                where={"id": transaction_id},
+                include={"relatedTo": True}
+            )
+
+            if not issue_transaction:
+                raise ResourceNotFoundException("Transaction not found")
+            if issue_transaction.type != "ISSUE":
+                raise InvalidOperationException("Can only return books from ISSUE transactions")
+            if issue_transaction.relatedTo:
+                raise InvalidOperationException("Book already returned")
+
+            rent_fee = return_data.rent_fee
+            if rent_fee is None:
+                rent_fee = fee_policy.fee(issue_transaction.issueDate, return_data.return_date)
+
+            # relatedTransactionId is unique, so a concurrent return of the
+            # same loan fails here instead of restocking the book twice.
+            try:
+                return_transaction = await tx.transaction.create(
+                    data={
+                        "type": "RETURN",
+                        "bookId": issue_transaction.bookId,
+                        "memberId": issue_transaction.memberId,
+                        "issueDate": issue_transaction.issueDate,
+                        "returnDate": return_data.return_date,
+                        "rentFee": rent_fee,
+                        "relatedTransactionId": transaction_id
+                    },
+                    include={
+                        "book": True,
+                        "member": True,
+                        "relatedTransaction": True
+                    }
+                )
+            except UniqueViolationError:
+                raise InvalidOperationException("Book already returned")
+            await stamp_transactions(tx, [return_transaction.id])
+
+            member_data = {"activeLoanCount": {"decrement": 1}}
+            if return_data.add_to_debt:
+                member_data["outstandingDebt"] = {"increment": rent_fee}
+            await tx.member.update(
+                where={"id": issue_transaction.memberId},
+                data=member_data
             )
-            
-            await prisma.book.update(
+
+            await tx.book.update(
                 where={"id": issue_transaction.bookId},
-                data={"quantity": issue_transaction.book.quantity + 1}
+                data={"quantity": {"increment": 1}, "onLoanCount": {"decrement": 1}}
             )
-            
             if return_data.add_to_debt:
-                await prisma.member.update(
-                    where={"id": issue_transaction.memberId},
-                    data={"outstandingDebt": issue_transaction.member.outstandingDebt + return_data.rent_fee}
-                )
+                await record_charges(tx, [issue_transaction.memberId], [rent_fee], [return_transaction.id])
 
+            await _bump_monthly_stat(tx, return_data.return_date, "returns", 1)
+
+        book_cache.invalidate(issue_transaction.bookId)
+        member_cache.invalidate(issue_transaction.memberId)
+        _announce("return", [LIVE_PROJECTION.apply(return_transaction)])
         return return_transaction
 
-    async def get_transactions(self, search: Optional[str], page: int, limit: int):
-        where = {}
+    async def batch_issue(self, request: BatchIssueRequest) -> BatchResult:
+        if not request.bookIds:
+            raise ValidationException("No books to issue")
+
+        async with transaction_scope() as tx:
+            # Lock the member and every requested book up front; allocation
+            # then happens in memory and is written back set-based.
+            members = await tx.query_raw(LOCK_MEMBERS, [request.memberId])
+            if not members:
+                raise ResourceNotFoundException("Member not found")
+            capacity = MAX_ACTIVE_LOANS - int(members[0]["activeLoanCount"])
+
+            books = await tx.query_raw(LOCK_BOOKS, list(set(request.bookIds)))
+            stock = {row["id"]: int(row["quantity"]) for row in books}
+
+            results = []
+            issued = []
+            for index, book_id in enumerate(request.bookIds):
+                result = BatchItemResult(index=index, bookId=book_id, status="failed")
+                if book_id not in stock:
+                    result.error = "Book not found"
+                elif stock[book_id] <= 0:
+                    result.error = "Book is out of stock"
+                elif len(issued) >= capacity:
+                    result.error = "Member has reached maximum number of active loans"
+                else:
+                    stock[book_id] -= 1
+                    result.status = "issued"
+                    issued.append(result)
+                results.append(result)
+
+            if issued:
+                await tx.execute_raw(BATCH_UPDATE_MEMBERS, [request.memberId], [len(issued)], [0.0])
+                book_ids, deltas = _tally((result.bookId, 1) for result in issued)
+                await tx.execute_raw(BATCH_UPDATE_BOOKS, book_ids, deltas)
+
+                rows = await tx.query_raw(
+                    BATCH_INSERT_ISSUES,
+                    [result.bookId for result in issued],
+                    request.memberId,
+                    _utc_naive(request.issueDate)
+                )
+                for result, transaction_id in zip(issued, sorted(row["id"] for row in rows)):
+                    result.transactionId = transaction_id
+                await stamp_transactions(tx, [row["id"] for row in rows])
+
+                await _bump_monthly_stat(tx, request.issueDate, "loans", len(issued))
+
+        book_cache.invalidate(*{result.bookId for result in issued})
+        member_cache.invalidate(request.memberId)
+        if issued:
+            await _announce_ids("issue", [result.transactionId for result in issued])
+        return BatchResult(succeeded=len(issued), failed=len(results) - len(issued), results=results)
+
+    async def batch_return(self, request: BatchReturnRequest) -> BatchResult:
+        if not request.items:
+            raise ValidationException("No transactions to return")
+
+        async with transaction_scope() as tx:
+            issues = await tx.transaction.find_many(
+                where={"id": {"in": list({item.transactionId for item in request.items})}},
+                include={"relatedTo": True}
+            )
+            by_id = {issue.id: issue for issue in issues}
+
+            results = []
+            accepted = {}
+            for index, item in enumerate(request.items):
+                issue = by_id.get(item.transactionId)
+                result = BatchItemResult(index=index, status="failed", transactionId=item.transactionId)
+                if not issue:
+                    result.error = "Transaction not found"
+                elif issue.type != "ISSUE":
+                    result.error = "Can only return books from ISSUE transactions"
+                elif issue.relatedTo or item.transactionId in accepted:
+                    result.error = "Book already returned"
+                else:
+                    result.bookId = issue.bookId
+                    fee = item.rent_fee
+                    if fee is None:
+                        fee = fee_policy.fee(issue.issueDate, request.return_date)
+                    accepted[item.transactionId] = (result, item, issue, fee)
+                results.append(result)
+
+            returned = []
+            if accepted:
+                # Lock before inserting so the counters below are updated
+                # under locks taken in the usual order
+                await tx.query_raw(LOCK_MEMBERS, list({issue.memberId for _, _, issue, _ in accepted.values()}))
+                await tx.query_raw(LOCK_BOOKS, list({issue.bookId for _, _, issue, _ in accepted.values()}))
+
+                rows = await tx.query_raw(
+                    BATCH_INSERT_RETURNS,
+                    list(accepted.keys()),
+                    [fee for _, _, _, fee in accepted.values()],
+                    _utc_naive(request.return_date)
+                )
+                # Rows skipped by ON CONFLICT were returned concurrently.
+                inserted = {row["relatedTransactionId"]: row["id"] for row in rows}
+                await stamp_transactions(tx, [row["id"] for row in rows])
+                for issue_id, (result, item, issue, fee) in accepted.items():
+                    if issue_id in inserted:
+                        result.status = "returned"
+                        returned.append((item, issue, fee))
+                    else:
+                        result.error = "Book already returned"
+
+            if returned:
+                member_ids, loans = _tally((issue.memberId, -1) for _, issue, _ in returned)
+                _, debts = _tally(
+                    (issue.memberId, fee if item.add_to_debt else 0.0)
+                    for item, issue, fee in returned
+                )
+                book_ids, deltas = _tally((issue.bookId, -1) for _, issue, _ in returned)
+                await tx.execute_raw(BATCH_UPDATE_MEMBERS, member_ids, loans, [float(debt) for debt in debts])
+                await tx.execute_raw(BATCH_UPDATE_BOOKS, book_ids, deltas)
+
+                charged = [(issue, fee) for item, issue, fee in returned if item.add_to_debt]
+                await record_charges(
+                    tx,
+                    [issue.memberId for issue, _ in charged],
+                    [float(fee) for _, fee in charged],
+                    [inserted[issue.id] for issue, _ in charged]
+                )
+
+                await _bump_monthly_stat(tx, request.return_date, "returns", len(returned))
+
+        book_cache.invalidate(*{issue.bookId for _, issue, _ in returned})
+        member_cache.invalidate(*{issue.memberId for _, issue, _ in returned})
+        if returned:
+            await _announce_ids("return", [inserted[issue.id] for _, issue, _ in returned])
+        return BatchResult(succeeded=len(returned), failed=len(results) - len(returned), results=results)
+
+    async def get_transactions(self, search: Optional[str], page: int, limit: int,
+                               cursor: Optional[str] = None, total: Optional[TotalMode] = None,
+                               fields: Optional[str] = None, expand: Optional[str] = None):
+        projection = Projection(fields, expand, TRANSACTION_FIELDS, TRANSACTION_RELATIONS)
+        include = projection.include(FULL_INCLUDE)
+
         if search:
-            where = {
-                "OR": [
-                    {"book": {"title": {"contains": search}}},
-                    {"member": {"name": {"contains": search}}}
-                ]
-            }
-
-        total = await prisma.transaction.count(where=where)
-        transactions = await prisma.transaction.find_many(
-            where=where,
-            skip=(page - 1) * limit,
-            take=limit,
-            order={"createdAt": "desc"},
-            include={
-                "book": True,
-                "member": True,
-                "relatedTransaction": True,
-                "relatedTo": True
-            }
-        )
+            if cursor is not None:
+                raise ValidationException("Cursor pagination is not supported for ranked search")
+            return projection.apply_page(await self._search_transactions(search, page, limit, include))
+
+        if cursor is not None:
+            page_data = await keyset_page("transaction", {}, cursor, limit, total or "none", include=include)
+        else:
+            page_data = await offset_page("transaction", {}, page, limit, total or "exact", include=include)
+        return projection.apply_page(page_data)
+
+    async def _search_transactions(self, search: str, page: int, limit: int, include: Optional[dict]):
+        ids, total = await search_ledger(search, (page - 1) * limit, limit)
+        transactions = await read_client().transaction.find_many(
+            where={"id": {"in": ids}},
+            include=include
+        ) if ids else []
+        by_id = {transaction.id: transaction for transaction in transactions}
 
         return {
-            "items": transactions,
+            "items": [by_id[transaction_id] for transaction_id in ids if transaction_id in by_id],
             "total": total,
             "page": page,
             "size": limit,
             "pages": (total + limit - 1) // limit
         }
 
-    async def get_monthly_data(self) -> List[MonthlyData]:
-        start_of_year = datetime.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-        months = [
-            {
-                "name": (start_of_year + timedelta(days=30*i)).strftime("%b"),
-                "start": start_of_year + timedelta(days=30*i),
-                "end": start_of_year + timedelta(days=30*(i+1) - 1)
-            }
-            for i in range(12)
-        ]
+    def export_transactions(self, fmt: ExportFormat, compress: bool):
+        return stream_export("transaction", TRANSACTION_FIELDS, fmt, compress)
+
+    async def get_monthly_data(self, year: Optional[int] = None,
+                               start_month: int = 1, end_month: int = 12) -> List[MonthlyData]:
+        if start_month > end_month:
+            raise ValidationException("start_month must not be after end_month")
+
+        year = year or datetime.now().year
+        months = [datetime(year, month, 1) for month in range(start_month, end_month + 1)]
+        range_end = _next_month(months[-1])
+
+        stats = await read_client().monthlystat.find_many(
+            where={"month": {"gte": months[0], "lt": range_end}}
+        )
+        by_month = {(stat.month.year, stat.month.month): stat for stat in stats}
 
         monthly_data = []
         for month in months:
-            loans = await prisma.transaction.count(
-                where={
-                    "type": "ISSUE",
-                    "createdAt": {
-                        "gte": month["start"],
-                        "lte": month["end"]
-                    }
-                }
-            )
-            returns = await prisma.transaction.count(
-                where={
-                    "type": "RETURN",
-                    "createdAt": {
-                        "gte": month["start"],
-                        "lte": month["end"]
-                    }
-                }
-            )
+            stat = by_month.get((month.year, month.month))
             monthly_data.append(MonthlyData(
-                name=month["name"],
-                loans=loans,
-                returns=returns
+                name=month.strftime("%b"),
+                loans=stat.loans if stat else 0,
+                returns=stat.returns if stat else 0
             ))
 
         return monthly_data
 
-    async def get_recent_transactions(self, limit: int = 5):
-        return await prisma.transaction.find_many(
+    async def get_recent_transactions(self, limit: int = 5, fields: Optional[str] = None,
+                                      expand: Optional[str] = None):
+        projection = Projection(fields, expand, TRANSACTION_FIELDS, TRANSACTION_RELATIONS)
+        transactions = await read_client().transaction.find_many(
             take=limit,
             order={"createdAt": "desc"},
-            include={
-                "book": True,
-                "member": True,
-                "relatedTransaction": True,
-                "relatedTo": True
-            }
+            include=projection.include(FULL_INCLUDE)
         )
+        return [projection.apply(transaction) for transaction in transactions]
 
     async def delete_transaction(self, transaction_id: int):
-        transaction = await prisma.transaction.find_unique(
-            where={"id": transaction_id},
-            include={
-                "book": True,
-                "member": True,
-                "relatedTransaction": True,
-                "relatedTo": True
-            }
-        )
-        
-        if not transaction:
-            raise ResourceNotFoundException("Transaction not found")
+        async with transaction_scope() as tx:
+            transaction = await tx.transaction.find_unique(
+                where={"id": transaction_id},
+                include={
+                    "relatedTransaction": True,
+                    "relatedTo": True
+                }
+            )
+
+            if not transaction:
+                raise ResourceNotFoundException("Transaction not found")
 
-        async with prisma.tx() as tx:
             if transaction.type == "ISSUE" and transaction.relatedTo:
-                await prisma.transaction.delete(where={"id": transaction.relatedTo.id})
-                    
-                await prisma.book.update(
+                # The copy is back on the shelf and the loan already closed,
+                # so only the return's charges and row go
+                await reverse_charges(tx, transaction.relatedTo.id)
+                await tx.transaction.delete(where={"id": transaction.relatedTo.id})
+
+            elif transaction.type == "RETURN" and transaction.relatedTransaction:
+                await tx.member.update(
+                    where={"id": transaction.memberId},
+                    data={"activeLoanCount": {"increment": 1}}
+                )
+                await reverse_charges(tx, transaction.id)
+
+                await tx.book.update(
                     where={"id": transaction.bookId},
-                    data={"quantity": transaction.book.quantity - 1}
+                    data={"quantity": {"decrement": 1}, "onLoanCount": {"increment": 1}}
                 )
 
-            elif transaction.type == "RETURN" and transaction.relatedTransaction:
-                await prisma.book.update(
+            elif transaction.type == "ISSUE":
+                await tx.member.update(
+                    where={"id": transaction.memberId},
+                    data={"activeLoanCount": {"decrement": 1}}
+                )
+                await tx.book.update(
                     where={"id": transaction.bookId},
-                    data={"quantity": transaction.book.quantity - 1}
+                    data={"quantity": {"increment": 1}, "onLoanCount": {"decrement": 1}}
                 )
-                
-                if transaction.rentFee and transaction.member.outstandingDebt >= transaction.rentFee:
-                    await prisma.member.update(
-                        where={"id": transaction.memberId},
-                        data={"outstandingDebt": transaction.member.outstandingDebt - transaction.rentFee}
-                    )
-
-            deleted_transaction = await prisma.transaction.delete(
+
+            deleted_transaction = await tx.transaction.delete(
                 where={"id": transaction_id},
                 include={
                     "book": True,
@@ -220,13 +495,23 @@ class TransactionService:
                 }
             )
 
-            if transaction.type == "ISSUE" and not transaction.relatedTo:
-                await prisma.book.update(
-                    where={"id": transaction.bookId},
-                    data={"quantity": transaction.book.quantity + 1}
-                )
+            if transaction.type == "ISSUE" and transaction.relatedTo and transaction.relatedTo.returnDate:
+                await _bump_monthly_stat(tx, transaction.relatedTo.returnDate, "returns", -1)
+            if transaction.type == "ISSUE":
+                await _bump_monthly_stat(tx, transaction.issueDate, "loans", -1)
+            elif transaction.returnDate:
+                await _bump_monthly_stat(tx, transaction.returnDate, "returns", -1)
 
+        book_cache.invalidate(transaction.bookId)
+        member_cache.invalidate(transaction.memberId)
+        _announce("delete", [LIVE_PROJECTION.apply(deleted_transaction)])
         return deleted_transaction
 
-    async def get_transaction_by_id(self, transaction_id: int):
-        return await prisma.transaction.find_unique(where={"id": transaction_id})
\ No newline at end of file
+    async def get_transaction_by_id(self, transaction_id: int, fields: Optional[str] = None,
+                                    expand: Optional[str] = None):
+        projection = Projection(fields, expand, TRANSACTION_FIELDS, TRANSACTION_RELATIONS)
+        transaction = await prisma.transaction.find_unique(
+            where={"id": transaction_id},
+            include=projection.include()
+        )
+        return projection.apply(transaction)
\ No newline at end of file
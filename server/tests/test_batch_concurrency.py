@@ -0,0 +1,98 @@
+"""Overlapping batch returns against a real database (DATABASE_URL);
+skipped when none is configured. Run from server/: python -m pytest tests"""
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+
+from config import DATABASE_URL, MAX_ACTIVE_LOANS
+
+if not DATABASE_URL:
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from database import prisma
+from models import BatchIssueRequest, BatchReturnItem, BatchReturnRequest, TransactionReturn
+from services.transaction_service import TransactionService, _bump_monthly_stat
+
+ROUNDS = 10
+
+async def _overlapping_returns(run_id: str, service: TransactionService, when: datetime) -> dict:
+    member = await prisma.member.create(data={
+        "name": "Batch stress", "email": f"batch-{run_id}@example.com"
+    })
+    books = [
+        await prisma.book.create(data={
+            "title": f"Batch {run_id} {index}", "author": "Stress",
+            "isbn": f"batch-{run_id}-{index}", "quantity": 1
+        })
+        for index in range(MAX_ACTIVE_LOANS)
+    ]
+    issued = await service.batch_issue(BatchIssueRequest(
+        memberId=member.id, bookIds=[book.id for book in books], issueDate=when
+    ))
+    loans = [result.transactionId for result in issued.results]
+
+    # Both batches cover the middle loan, and a single return runs alongside
+    middle = len(loans) // 2
+    first = loans[:middle + 1]
+    second = loans[middle:-1]
+    outcomes = await asyncio.gather(
+        service.batch_return(BatchReturnRequest(
+            return_date=when, items=[BatchReturnItem(transactionId=loan) for loan in first]
+        )),
+        service.batch_return(BatchReturnRequest(
+            return_date=when, items=[BatchReturnItem(transactionId=loan) for loan in second]
+        )),
+        service.return_book(loans[-1], TransactionReturn(return_date=when, rent_fee=0)),
+        return_exceptions=True
+    )
+
+    return {
+        "issued": issued.succeeded,
+        "outcomes": outcomes,
+        "member": await prisma.member.find_unique(where={"id": member.id}),
+        "books": await prisma.book.find_many(where={"id": {"in": [book.id for book in books]}}),
+        "returns": await prisma.transaction.count(where={"memberId": member.id, "type": "RETURN"}),
+    }
+
+async def _cleanup(run_id: str, when: datetime):
+    where = {"member": {"is": {"email": f"batch-{run_id}@example.com"}}}
+    loans = await prisma.transaction.count(where={**where, "type": "ISSUE"})
+    returns = await prisma.transaction.count(where={**where, "type": "RETURN"})
+    await prisma.transaction.delete_many(where={**where, "type": "RETURN"})
+    await prisma.transaction.delete_many(where=where)
+    if loans:
+        await _bump_monthly_stat(prisma, when, "loans", -loans)
+    if returns:
+        await _bump_monthly_stat(prisma, when, "returns", -returns)
+    await prisma.book.delete_many(where={"isbn": {"startswith": f"batch-{run_id}-"}})
+    await prisma.member.delete_many(where={"email": f"batch-{run_id}@example.com"})
+
+def test_overlapping_batch_returns_do_not_deadlock():
+    async def run():
+        await prisma.connect()
+        service = TransactionService()
+        when = datetime.now()
+        results = []
+        try:
+            for _ in range(ROUNDS):
+                run_id = uuid.uuid4().hex[:12]
+                try:
+                    results.append(await _overlapping_returns(run_id, service, when))
+                finally:
+                    await _cleanup(run_id, when)
+        finally:
+            await prisma.disconnect()
+        return results
+
+    for result in asyncio.run(run()):
+        errors = [outcome for outcome in result["outcomes"] if isinstance(outcome, Exception)]
+        assert not errors
+        first, second, _ = result["outcomes"]
+
+        # The shared loan is returned by exactly one of the two batches
+        assert first.succeeded + second.succeeded + 1 == result["issued"] == MAX_ACTIVE_LOANS
+        assert result["returns"] == MAX_ACTIVE_LOANS
+        assert result["member"].activeLoanCount == 0
+        assert all(book.quantity == 1 and book.onLoanCount == 0 for book in result["books"])
@@ -0,0 +1,40 @@
+"""Concurrent checkouts against a real database (DATABASE_URL); skipped
+when none is configured. Run from server/: python -m pytest tests"""
+import asyncio
+
+import pytest
+
+from config import DATABASE_URL, MAX_ACTIVE_LOANS
+
+if not DATABASE_URL:
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from benchmarks.checkout_stress import expected_issues, stress
+from database import prisma
+
+def _stress(stock: int, requests: int, members: int) -> dict:
+    async def run():
+        await prisma.connect()
+        try:
+            return await stress(stock, requests, members)
+        finally:
+            await prisma.disconnect()
+    return asyncio.run(run())
+
+def test_last_copies_are_issued_exactly_once():
+    result = _stress(stock=3, requests=300, members=100)
+
+    assert not result["errors"]
+    assert result["issued"] == 3
+    assert result["finalQuantity"] == 0
+    assert result["ledgerIssues"] == 3
+
+def test_members_never_exceed_loan_limit():
+    members, requests = 2, 20 * MAX_ACTIVE_LOANS
+    result = _stress(stock=requests, requests=requests, members=members)
+
+    assert not result["errors"]
+    assert result["issued"] == expected_issues(requests, requests, members) == members * MAX_ACTIVE_LOANS
+    assert result["finalQuantity"] == requests - result["issued"] >= 0
+    assert result["maxActiveLoans"] <= MAX_ACTIVE_LOANS
+    assert result["maxLedgerLoans"] <= MAX_ACTIVE_LOANS
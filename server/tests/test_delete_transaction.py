@@ -0,0 +1,76 @@
+"""Deleting ledger rows against a real database (DATABASE_URL); skipped
+when none is configured. Run from server/: python -m pytest tests"""
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+
+from config import DATABASE_URL
+
+if not DATABASE_URL:
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from database import prisma
+from models import TransactionCreate, TransactionReturn
+from services.transaction_service import TransactionService, _bump_monthly_stat, _month_start
+
+async def _monthly(when: datetime):
+    stat = await prisma.monthlystat.find_unique(where={"month": _month_start(when)})
+    return (stat.loans, stat.returns) if stat else (0, 0)
+
+async def _delete_returned_loan(run_id: str, service: TransactionService, when: datetime) -> dict:
+    member = await prisma.member.create(data={
+        "name": "Delete check", "email": f"delete-{run_id}@example.com"
+    })
+    book = await prisma.book.create(data={
+        "title": f"Delete {run_id}", "author": "Check", "isbn": f"delete-{run_id}", "quantity": 2
+    })
+    before = await _monthly(when)
+
+    loan = await service.create_transaction(TransactionCreate(
+        bookId=book.id, memberId=member.id, issueDate=when
+    ))
+    await service.return_book(loan.id, TransactionReturn(return_date=when, rent_fee=0))
+    await service.delete_transaction(loan.id)
+
+    return {
+        "before": before,
+        "after": await _monthly(when),
+        "member": await prisma.member.find_unique(where={"id": member.id}),
+        "book": await prisma.book.find_unique(where={"id": book.id}),
+        "rows": await prisma.transaction.count(where={"bookId": book.id}),
+    }
+
+async def _cleanup(run_id: str, when: datetime):
+    # Only reached with rows left behind when the service itself failed
+    where = {"book": {"is": {"isbn": f"delete-{run_id}"}}}
+    loans = await prisma.transaction.count(where={**where, "type": "ISSUE"})
+    returns = await prisma.transaction.count(where={**where, "type": "RETURN"})
+    await prisma.transaction.delete_many(where={**where, "type": "RETURN"})
+    await prisma.transaction.delete_many(where=where)
+    if loans:
+        await _bump_monthly_stat(prisma, when, "loans", -loans)
+    if returns:
+        await _bump_monthly_stat(prisma, when, "returns", -returns)
+    await prisma.book.delete_many(where={"isbn": f"delete-{run_id}"})
+    await prisma.member.delete_many(where={"email": f"delete-{run_id}@example.com"})
+
+def test_deleting_a_returned_loan_keeps_every_copy():
+    async def run():
+        await prisma.connect()
+        run_id = uuid.uuid4().hex[:12]
+        when = datetime.now()
+        try:
+            return await _delete_returned_loan(run_id, TransactionService(), when)
+        finally:
+            await _cleanup(run_id, when)
+            await prisma.disconnect()
+
+    result = asyncio.run(run())
+
+    assert result["rows"] == 0
+    assert result["book"].quantity == 2
+    assert result["book"].onLoanCount == 0
+    assert result["member"].activeLoanCount == 0
+    assert result["after"] == result["before"]
@@ -0,0 +1,105 @@
+"""FrappeClient caching, coalescing and retries against an in-process
+httpx.MockTransport. Run from server/: python -m pytest tests"""
+import asyncio
+
+import httpx
+import pytest
+
+from exceptions import InvalidOperationException
+from services import frappe_client as frappe_module
+from services.frappe_client import FrappeClient
+
+URL = "https://frappe.test/api/method/frappe-library"
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(frappe_module, "FRAPPE_RETRY_BACKOFF_SECONDS", 0)
+
+def _upstream(statuses=(), delay: float = 0):
+    """Transport answering with the given statuses first, then 200s; the
+    requests it saw are collected in `transport.requests`."""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if delay:
+            await asyncio.sleep(delay)
+        if len(requests) <= len(statuses):
+            return httpx.Response(statuses[len(requests) - 1])
+        return httpx.Response(200, json={"message": [{"isbn": request.url.params.get("isbn")}]})
+
+    transport = httpx.MockTransport(handler)
+    transport.requests = requests
+    return transport
+
+def _run(client: FrappeClient, *searches):
+    async def run():
+        try:
+            return await asyncio.gather(*(client.search(**params) for params in searches))
+        finally:
+            await client.close()
+    return asyncio.run(run())
+
+def test_repeated_search_is_served_from_cache():
+    transport = _upstream()
+    client = FrappeClient(base_url=URL, transport=transport)
+
+    async def run():
+        try:
+            first = await client.search(isbn="123", page=1)
+            # Same query once whitespace is normalized and None dropped
+            second = await client.search(isbn=" 123 ", page=1, title=None)
+            return first, second
+        finally:
+            await client.close()
+
+    first, second = asyncio.run(run())
+    assert first == second == [{"isbn": "123"}]
+    assert len(transport.requests) == 1
+
+def test_expired_entries_are_fetched_again():
+    transport = _upstream()
+    client = FrappeClient(base_url=URL, transport=transport, cache_ttl=0)
+
+    async def run():
+        try:
+            await client.search(isbn="123")
+            await client.search(isbn="123")
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+    assert len(transport.requests) == 2
+
+def test_concurrent_identical_searches_share_one_request():
+    transport = _upstream(delay=0.05)
+    client = FrappeClient(base_url=URL, transport=transport)
+
+    results = _run(client, *[{"isbn": "123"}] * 10, {"isbn": "456"})
+
+    assert results[:10] == [[{"isbn": "123"}]] * 10
+    assert results[10] == [{"isbn": "456"}]
+    assert len(transport.requests) == 2
+
+def test_server_errors_are_retried():
+    transport = _upstream(statuses=(502, 503))
+    client = FrappeClient(base_url=URL, transport=transport, retries=2)
+
+    assert _run(client, {"isbn": "123"}) == [[{"isbn": "123"}]]
+    assert len(transport.requests) == 3
+
+def test_gives_up_after_the_last_retry():
+    transport = _upstream(statuses=(500, 500, 500))
+    client = FrappeClient(base_url=URL, transport=transport, retries=2)
+
+    with pytest.raises(InvalidOperationException):
+        _run(client, {"isbn": "123"})
+    assert len(transport.requests) == 3
+
+def test_client_errors_are_not_retried():
+    transport = _upstream(statuses=(404,))
+    client = FrappeClient(base_url=URL, transport=transport, retries=2)
+
+    with pytest.raises(InvalidOperationException):
+        _run(client, {"isbn": "123"})
+    assert len(transport.requests) == 1
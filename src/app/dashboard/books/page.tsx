@@ -41,6 +41,7 @@ type Book = {
     author: string
     isbn: string
     quantity: number
+    onLoanCount?: number
     publisher: string
     updatedAt: string
 }
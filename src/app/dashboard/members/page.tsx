@@ -156,8 +156,8 @@ export default function MembersPage() {
                                     </div>
                                 </TableCell>
                                 <TableCell>
-                                    <Badge variant={member.transactions.length > 0 ? 'default' : 'secondary'}>
-                                        {member.transactions.length}
+                                    <Badge variant={member.activeLoanCount > 0 ? 'default' : 'secondary'}>
+                                        {member.activeLoanCount}
                                     </Badge>
                                 </TableCell>
                                 <TableCell>
@@ -200,7 +200,7 @@ export default function MembersPage() {
                                             <DropdownMenuItem
                                                 className="text-destructive"
                                                 onClick={() => deleteMutation.mutate(member.id)}
-                                                disabled={member.transactions.length > 0 || member.outstandingDebt > 0}
+                                                disabled={member.activeLoanCount > 0 || member.outstandingDebt > 0}
                                             >
                                                 Delete member
                                             </DropdownMenuItem>
@@ -27,6 +27,7 @@ interface BookDialogProps {
         author: string
         isbn: string
         quantity: number
+        onLoanCount?: number
         publisher?: string
         imageUrl?: string
     }
@@ -36,7 +37,9 @@ export function BookDialog({ open, onOpenChange, book }: BookDialogProps) {
     const [title, setTitle] = React.useState(book?.title ?? '')
     const [author, setAuthor] = React.useState(book?.author ?? '')
     const [isbn, setIsbn] = React.useState(book?.isbn ?? '')
-    const [quantity, setQuantity] = React.useState(book?.quantity ?? 1)
+    // The API takes the number of copies owned; the book reports the ones on
+    // the shelf and on loan separately
+    const [quantity, setQuantity] = React.useState(book ? book.quantity + (book.onLoanCount ?? 0) : 1)
     const [publisher, setPublisher] = React.useState(book?.publisher ?? '')
     const [imageUrl, setImageUrl] = React.useState(book?.imageUrl ?? '')
 
@@ -153,8 +153,8 @@ export function MemberDialog({ open, onOpenChange, member }: MemberDialogProps)
                                 <div className="space-y-2">
                                     <Label>Active Loans</Label>
                                     <div>
-                                        <Badge variant={member.transactions.length > 0 ? 'default' : 'secondary'}>
-                                            {member.transactions.length} active loans
+                                        <Badge variant={member.activeLoanCount > 0 ? 'default' : 'secondary'}>
+                                            {member.activeLoanCount} active loans
                                         </Badge>
                                     </div>
                                 </div>
@@ -0,0 +1,37 @@
+import { cookies } from 'next/headers'
+
+export const API_URL = process.env.PYTHON_API_URL || 'http://localhost:8000'
+
+// The Python API answers writes with an X-Read-After token (a unix timestamp).
+// Sending it back on later requests keeps those reads on the primary database,
+// and away from the API's per-worker caches, until then. A user thus sees their
+// own changes even when a read replica lags or another worker cached the old row.
+// The token is kept per browser in a short-lived cookie.
+const READ_AFTER_HEADER = 'X-Read-After'
+const READ_AFTER_COOKIE = 'read_after'
+
+export async function apiFetch(path: string, init: RequestInit = {}): Promise<Response> {
+    const store = cookies()
+    const headers = new Headers(init.headers)
+    const readAfter = store.get(READ_AFTER_COOKIE)?.value
+    if (readAfter) {
+        headers.set(READ_AFTER_HEADER, readAfter)
+    }
+
+    const response = await fetch(`${API_URL}${path}`, { ...init, headers })
+
+    const token = response.headers.get(READ_AFTER_HEADER)
+    if (token) {
+        try {
+            store.set(READ_AFTER_COOKIE, token, {
+                httpOnly: true,
+                sameSite: 'lax',
+                path: '/',
+                expires: new Date(Number(token) * 1000)
+            })
+        } catch {
+            // Cookies are read-only when rendering server components
+        }
+    }
+    return response
+}
@@ -3,13 +3,12 @@ import { createTRPCRouter, protectedProcedure } from '../trpc'
 import { TRPCError } from '@trpc/server'
 import type { Book, PaginatedResponse, FrappeBook, MonthlyData } from '@/types/prisma'
 import { logger } from '@/utils/logger'
-
-const API_URL = process.env.PYTHON_API_URL || 'http://localhost:8000'
+import { apiFetch } from '../python'
 
 export const bookRouter = createTRPCRouter({
     getById: protectedProcedure.input(z.number()).query(async ({ input }): Promise<Book> => {
         logger.info('Fetching book by ID', { id: input })
-        const response = await fetch(`${API_URL}/api/books/${input}`)
+        const response = await apiFetch(`/api/books/${input}`)
         if (!response.ok) {
             logger.error('Book not found', { id: input, status: response.status })
             throw new TRPCError({
@@ -38,7 +37,7 @@ export const bookRouter = createTRPCRouter({
             })
             if (input.search) params.append('search', input.search)
 
-            const response = await fetch(`${API_URL}/api/books?${params}`)
+            const response = await apiFetch(`/api/books?${params}`)
             if (!response.ok) {
                 logger.error('Failed to fetch books', { status: response.status })
                 const error = await response.json()
@@ -66,7 +65,7 @@ export const bookRouter = createTRPCRouter({
         )
         .mutation(async ({ input }): Promise<Book> => {
             logger.info('Creating new book', { input })
-            const response = await fetch(`${API_URL}/api/books`, {
+            const response = await apiFetch(`/api/books`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(input)
@@ -98,7 +97,7 @@ export const bookRouter = createTRPCRouter({
         .mutation(async ({ input }): Promise<Book> => {
             logger.info('Updating book', { id: input.id, input })
             const { id, ...data } = input
-            const response = await fetch(`${API_URL}/api/books/${id}`, {
+            const response = await apiFetch(`/api/books/${id}`, {
                 method: 'PUT',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(data)
@@ -117,7 +116,7 @@ export const bookRouter = createTRPCRouter({
 
     delete: protectedProcedure.input(z.number()).mutation(async ({ input }): Promise<Book> => {
         logger.info('Deleting book', { id: input })
-        const response = await fetch(`${API_URL}/api/books/${input}`, {
+        const response = await apiFetch(`/api/books/${input}`, {
             method: 'DELETE'
         })
         if (!response.ok) {
@@ -151,7 +150,7 @@ export const bookRouter = createTRPCRouter({
             if (input.publisher) params.append('publisher', input.publisher)
             params.append('page', input.page.toString())
 
-            const response = await fetch(`${API_URL}/api/books/search/frappe?${params}`)
+            const response = await apiFetch(`/api/books/search/frappe?${params}`)
             if (!response.ok) {
                 logger.error('Failed to fetch books from Frappe API', { status: response.status })
                 throw new TRPCError({
@@ -166,7 +165,7 @@ export const bookRouter = createTRPCRouter({
 
     getOverview: protectedProcedure.query(async () => {
         logger.info('Fetching book overview')
-        const response = await fetch(`${API_URL}/api/books/overview`)
+        const response = await apiFetch(`/api/books/overview`)
         if (!response.ok) {
             const error = await response.json()
             console.log(error)
@@ -193,7 +192,7 @@ export const bookRouter = createTRPCRouter({
             })
         )
         .mutation(async ({ input }): Promise<Book> => {
-            const response = await fetch(`${API_URL}/api/books/import`, {
+            const response = await apiFetch(`/api/books/import`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(input)
@@ -220,7 +219,7 @@ export const bookRouter = createTRPCRouter({
             )
         )
         .mutation(async ({ input }): Promise<{ imported: number; total: number }> => {
-            const response = await fetch(`${API_URL}/api/books/import-multiple`, {
+            const response = await apiFetch(`/api/books/import-multiple`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(input)
@@ -236,7 +235,7 @@ export const bookRouter = createTRPCRouter({
 
     getMonthlyData: protectedProcedure.query(async (): Promise<MonthlyData[]> => {
         logger.info('Fetching monthly data')
-        const response = await fetch(`${API_URL}/api/books/monthly-data`)
+        const response = await apiFetch(`/api/books/monthly-data`)
         if (!response.ok) {
             logger.error('Failed to fetch monthly data', { status: response.status })
             throw new TRPCError({
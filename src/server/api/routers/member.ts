@@ -3,8 +3,7 @@ import { createTRPCRouter, protectedProcedure } from '../trpc'
 import { TRPCError } from '@trpc/server'
 import type { Member, PaginatedResponse } from '@/types/prisma'
 import { logger } from '@/utils/logger' // Assuming you have a logger utility
-
-const API_URL = process.env.PYTHON_API_URL || 'http://localhost:8000'
+import { apiFetch } from '../python'
 
 export const memberRouter = createTRPCRouter({
     getAll: protectedProcedure
@@ -23,7 +22,7 @@ export const memberRouter = createTRPCRouter({
             })
             if (input.search) params.append('search', input.search)
 
-            const response = await fetch(`${API_URL}/api/members?${params}`)
+            const response = await apiFetch(`/api/members?${params}`)
             if (!response.ok) {
                 logger.error('Failed to fetch members', { status: response.status })
                 throw new TRPCError({
@@ -38,7 +37,7 @@ export const memberRouter = createTRPCRouter({
 
     getById: protectedProcedure.input(z.number()).query(async ({ input }): Promise<Member> => {
         logger.info('Fetching member by ID', { id: input })
-        const response = await fetch(`${API_URL}/api/members/${input}`)
+        const response = await apiFetch(`/api/members/${input}`)
         if (!response.ok) {
             logger.error('Member not found', { id: input, status: response.status })
             throw new TRPCError({
@@ -64,7 +63,7 @@ export const memberRouter = createTRPCRouter({
         )
         .mutation(async ({ input }): Promise<Member> => {
             logger.info('Creating new member', { input })
-            const response = await fetch(`${API_URL}/api/members`, {
+            const response = await apiFetch(`/api/members`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(input)
@@ -97,7 +96,7 @@ export const memberRouter = createTRPCRouter({
         .mutation(async ({ input }): Promise<Member> => {
             logger.info('Updating member', { input })
             const { id, ...data } = input
-            const response = await fetch(`${API_URL}/api/members/${id}`, {
+            const response = await apiFetch(`/api/members/${id}`, {
                 method: 'PUT',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(data)
@@ -117,7 +116,7 @@ export const memberRouter = createTRPCRouter({
 
     delete: protectedProcedure.input(z.number()).mutation(async ({ input }): Promise<Member> => {
         logger.info('Deleting member', { id: input })
-        const response = await fetch(`${API_URL}/api/members/${input}`, {
+        const response = await apiFetch(`/api/members/${input}`, {
             method: 'DELETE'
         })
         if (!response.ok) {
@@ -141,7 +140,7 @@ export const memberRouter = createTRPCRouter({
             })
         )
         .mutation(async ({ input }): Promise<Member> => {
-            const response = await fetch(`${API_URL}/api/members/${input.id}/pay-debt?amount=${input.amount}`, {
+            const response = await apiFetch(`/api/members/${input.id}/pay-debt?amount=${input.amount}`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' }
             })
@@ -157,7 +156,7 @@ export const memberRouter = createTRPCRouter({
 
     clearDebt: protectedProcedure.input(z.number()).mutation(async ({ input }) => {
         logger.info('Clearing debt for member', { id: input })
-        const response = await fetch(`${API_URL}/api/members/${input}/clear-debt`, {
+        const response = await apiFetch(`/api/members/${input}/clear-debt`, {
             method: 'POST'
         })
         if (!response.ok) {
@@ -3,8 +3,7 @@ import { createTRPCRouter, protectedProcedure } from '../trpc'
 import { TRPCError } from '@trpc/server'
 import type { Transaction, PaginatedResponse } from '@/types/prisma'
 import { logger } from '@/utils/logger'
-
-const API_URL = process.env.PYTHON_API_URL || 'http://localhost:8000'
+import { apiFetch } from '../python'
 
 export const transactionRouter = createTRPCRouter({
     getAll: protectedProcedure
@@ -23,7 +22,7 @@ export const transactionRouter = createTRPCRouter({
             })
             if (input.search) params.append('search', input.search)
 
-            const response = await fetch(`${API_URL}/api/transactions?${params}`)
+            const response = await apiFetch(`/api/transactions?${params}`)
             if (!response.ok) {
                 logger.error('Failed to fetch transactions', { status: response.status })
                 throw new TRPCError({
@@ -38,7 +37,7 @@ export const transactionRouter = createTRPCRouter({
 
     getById: protectedProcedure.input(z.number()).query(async ({ input }): Promise<Transaction> => {
         logger.info('Fetching transaction by ID', { id: input })
-        const response = await fetch(`${API_URL}/api/transactions/${input}`)
+        const response = await apiFetch(`/api/transactions/${input}`)
         if (!response.ok) {
             logger.error('Transaction not found', { id: input, status: response.status })
             throw new TRPCError({
@@ -61,7 +60,7 @@ export const transactionRouter = createTRPCRouter({
         )
         .mutation(async ({ input }): Promise<Transaction> => {
             logger.info('Creating new transaction', { input })
-            const response = await fetch(`${API_URL}/api/transactions`, {
+            const response = await apiFetch(`/api/transactions`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify(input)
@@ -84,13 +83,13 @@ export const transactionRouter = createTRPCRouter({
             z.object({
                 id: z.number(),
                 returnDate: z.date(),
-                rentFee: z.number(),
+                rentFee: z.number().optional(),
                 addToDebt: z.boolean().default(false)
             })
         )
         .mutation(async ({ input }): Promise<Transaction> => {
             logger.info('Creating return transaction', { input })
-            const response = await fetch(`${API_URL}/api/transactions/${input.id}/return`, {
+            const response = await apiFetch(`/api/transactions/${input.id}/return`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -114,7 +113,7 @@ export const transactionRouter = createTRPCRouter({
 
     getMonthlyData: protectedProcedure.query(async () => {
         logger.info('Fetching monthly transaction data')
-        const response = await fetch(`${API_URL}/api/transactions/monthly-data`)
+        const response = await apiFetch(`/api/transactions/monthly-data`)
         if (!response.ok) {
             logger.error('Failed to fetch monthly data', { status: response.status })
             throw new TRPCError({
@@ -129,7 +128,7 @@ export const transactionRouter = createTRPCRouter({
 
     getRecent: protectedProcedure.input(z.object({ limit: z.number().default(5) })).query(async ({ input }) => {
         logger.info('Fetching recent transactions', { limit: input.limit })
-        const response = await fetch(`${API_URL}/api/transactions/recent?limit=${input.limit}`)
+        const response = await apiFetch(`/api/transactions/recent?limit=${input.limit}`)
         if (!response.ok) {
             logger.error('Failed to fetch recent transactions', { status: response.status })
             throw new TRPCError({
@@ -144,7 +143,7 @@ export const transactionRouter = createTRPCRouter({
 
     delete: protectedProcedure.input(z.number()).mutation(async ({ input }): Promise<Transaction> => {
         logger.info('Deleting transaction', { id: input })
-        const response = await fetch(`${API_URL}/api/transactions/${input}`, {
+        const response = await apiFetch(`/api/transactions/${input}`, {
             method: 'DELETE'
         })
         if (!response.ok) {
@@ -15,9 +15,12 @@ export type Member = {
     email: string
     address?: string | null
     outstandingDebt: number
+    activeLoanCount: number
+    totalLoans: number
+    lastActivity?: Date | null
+    overdueCount: number
     createdAt: Date
     updatedAt: Date
-    transactions: Transaction[]
 }
 
 export type TransactionType = 'ISSUE' | 'RETURN'
@@ -30,6 +33,7 @@ export type Transaction = {
     issueDate: Date
     returnDate?: Date | null
     rentFee?: number | null
+    accruedFee: number
     relatedTransactionId?: number | null
     relatedTransaction?: Transaction | null
     returnTransaction?: Transaction | null